@@ -1,16 +1,27 @@
 import sys
 import json
 import pickle
+import hashlib
+from urllib.parse import quote
 from pathlib import Path
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from google_auth_oauthlib.flow import Flow
-from fastapi.responses import RedirectResponse, HTMLResponse
-from gmail_mcp.auth import save_credentials, logout as auth_logout
+from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse, Response, StreamingResponse
 from gmail_client import gmail_client
-from models import EmailListRequest, EmailReadRequest, EmailSendRequest, ChatMessage, ChatResponse
-from typing import Optional
+from models import (
+    EmailListRequest, EmailReadRequest, EmailSendRequest, EmailSummaryRequest,
+    EmailBulkRequest, EmailLabelRequest, ChatMessage, ChatResponse
+)
+from typing import Optional, TYPE_CHECKING
 from llm_client import llm_client
+from state import state_backend
+from gmail_mcp.spool import spool_path, clear_spool
+import tracing
+
+# Google auth libraries are imported inside the handlers that need them to
+# keep API startup (and --reload) fast
+if TYPE_CHECKING:
+    from google_auth_oauthlib.flow import Flow
 
 app = FastAPI(title="MCP Client")
 
@@ -20,8 +31,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """Profile requests sent with an X-Profile: 1 header when PROFILE_REQUESTS is set"""
+    if not tracing.PROFILE_REQUESTS or request.headers.get("x-profile") != "1":
+        return await call_next(request)
+
+    with tracing.profile(request.url.path):
+        return await call_next(request)
+
 SCOPES = [
     'https://www.googleapis.com/auth/gmail.readonly',
     'https://www.googleapis.com/auth/gmail.send',
@@ -33,40 +54,56 @@ CREDENTIALS_PATH = './gmail_mcp_credentials.json'
 OAUTH_PORT = 8080
 REDIRECT_URI = f'http://localhost:{OAUTH_PORT}/auth/callback'
 
-oauth_flow: Optional[Flow] = None
+OAUTH_FLOW_TTL = 600
+STREAM_CHUNK_SIZE = 64 * 1024
 
-@app.get("/auth/start")
-async def auth_start():
-    global oauth_flow
+def create_oauth_flow(**kwargs) -> "Flow":
+    from google_auth_oauthlib.flow import Flow
 
-    oauth_flow = Flow.from_client_secrets_file(
+    return Flow.from_client_secrets_file(
         CREDENTIALS_PATH,
         scopes=SCOPES,
-        redirect_uri=REDIRECT_URI
+        redirect_uri=REDIRECT_URI,
+        **kwargs
     )
 
+@app.get("/auth/start")
+async def auth_start():
+    oauth_flow = create_oauth_flow()
+
     authorization_url, state = oauth_flow.authorization_url(
         access_type='offline',
         include_granted_scopes='true',
         prompt='consent'
     )
 
+    # The callback may be served by a different worker, so keep what it needs
+    # to rebuild the flow in the shared state backend, keyed by OAuth state
+    await state_backend.aset(
+        f"oauth:{state}",
+        {"code_verifier": oauth_flow.code_verifier},
+        ttl=OAUTH_FLOW_TTL
+    )
+
     return RedirectResponse(url=authorization_url)
 
 @app.get("/auth/callback")
 async def auth_callback(code: str, state: str):
-    global oauth_flow
+    pending_flow = await state_backend.aget(f"oauth:{state}")
 
-    if not oauth_flow:
+    if not pending_flow:
         raise HTTPException(status_code=400, detail="OAuth flow not started")
     
     try:
+        await state_backend.adelete(f"oauth:{state}")
+        oauth_flow = create_oauth_flow(state=state, code_verifier=pending_flow["code_verifier"])
         oauth_flow.fetch_token(code=code)
         token = oauth_flow.credentials
         with open(TOKEN_PATH, 'wb') as f:
             pickle.dump(token, f)
 
         sys.path.insert(0, str(Path(__file__).parent))
+        from gmail_mcp.auth import save_credentials
         save_credentials(token)
 
         return HTMLResponse(
@@ -124,16 +161,42 @@ async def auth_status():
 async def logout():
     """Logout and clear credentials"""
     try:
+        from gmail_mcp.auth import logout as auth_logout
         auth_logout()
+        await state_backend.adelete_prefix("tool:")
+        await state_backend.adelete_prefix("chat:")
+        clear_spool()
         return {"success": True, "message": "Logged out successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def email_list_etag(request: EmailListRequest, sync_token: str) -> str:
+    """ETag for an email list: the mailbox's Gmail history id, scoped to the list's filters"""
+    scope = hashlib.sha1(f"{request.max_results}:{request.query}".encode('utf-8')).hexdigest()[:12]
+    return f'"{sync_token}-{scope}"'
+
+def sync_token_from_etag(etag: Optional[str], request: EmailListRequest) -> str:
+    if not etag:
+        return ""
+    sync_token = etag.removeprefix('W/').strip('"').rsplit('-', 1)[0]
+    return sync_token if email_list_etag(request, sync_token) == etag.removeprefix('W/') else ""
+
 @app.post("/api/emails/list")
-async def list_emails(request: EmailListRequest):
-    """List emails"""
-    result = await gmail_client.call_tool("list_emails", request.model_dump())
-    return json.loads(result)
+async def list_emails(request: EmailListRequest, if_none_match: Optional[str] = Header(default=None)):
+    """List emails, or only the changes since the client's sync token or ETag"""
+    arguments = request.model_dump()
+    if not arguments["sync_token"]:
+        arguments["sync_token"] = sync_token_from_etag(if_none_match, request)
+
+    result = json.loads(await gmail_client.call_tool("sync_emails", arguments))
+
+    if result.get("status") not in (200, 304):
+        return result
+
+    headers = {"ETag": email_list_etag(request, result["data"]["sync_token"])}
+    if result["status"] == 304:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(result, headers=headers)
 
 @app.post("/api/emails/read")
 async def read_email(request: EmailReadRequest):
@@ -141,12 +204,89 @@ async def read_email(request: EmailReadRequest):
     result = await gmail_client.call_tool("read_email", request.model_dump())
     return json.loads(result)
 
+def iter_file(path: Path, remove: bool = False):
+    """Read a spooled file in chunks so large bodies and attachments aren't held in memory"""
+    try:
+        with open(path, 'rb') as f:
+            while chunk := f.read(STREAM_CHUNK_SIZE):
+                yield chunk
+    finally:
+        if remove:
+            path.unlink(missing_ok=True)
+
+@app.get("/api/emails/blobs/{handle}")
+async def download_body(handle: str):
+    """Stream the full body of an email that read_email returned truncated"""
+    path = spool_path(handle)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Email body not found or expired, read the email again")
+    return StreamingResponse(iter_file(path), media_type="text/plain; charset=utf-8")
+
+@app.get("/api/emails/{email_id}/attachments/{attachment_id}")
+async def download_attachment(email_id: str, attachment_id: str, filename: str = "attachment",
+                              mime_type: str = "application/octet-stream"):
+    """Stream an email attachment"""
+    result = json.loads(await gmail_client.call_tool(
+        "fetch_attachment", {"email_id": email_id, "attachment_id": attachment_id}
+    ))
+    if result.get("status") != 200:
+        raise HTTPException(status_code=result.get("status", 500), detail=result.get("message"))
+
+    path = spool_path(result["data"]["handle"])
+    if path is None:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+
+    return StreamingResponse(
+        iter_file(path, remove=True),
+        media_type=mime_type,
+        headers={
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}",
+            "Content-Length": str(result["data"]["size"])
+        }
+    )
+
+@app.post("/api/emails/summaries")
+async def summarize_emails(request: EmailSummaryRequest):
+    """Summarize email threads"""
+    result = await gmail_client.call_tool("summarize_threads", request.model_dump())
+    return json.loads(result)
+
 @app.post("/api/emails/send")
 async def send_email(request: EmailSendRequest):
     """Send email"""
     result = await gmail_client.call_tool("send_email", request.model_dump())
     return json.loads(result)
 
+@app.post("/api/emails/mark-read")
+async def mark_read(request: EmailBulkRequest):
+    """Mark emails as read"""
+    result = await gmail_client.call_tool("mark_read", request.model_dump())
+    return json.loads(result)
+
+@app.post("/api/emails/mark-unread")
+async def mark_unread(request: EmailBulkRequest):
+    """Mark emails as unread"""
+    result = await gmail_client.call_tool("mark_unread", request.model_dump())
+    return json.loads(result)
+
+@app.post("/api/emails/archive")
+async def archive_emails(request: EmailBulkRequest):
+    """Archive emails"""
+    result = await gmail_client.call_tool("archive_emails", request.model_dump())
+    return json.loads(result)
+
+@app.post("/api/emails/trash")
+async def trash_emails(request: EmailBulkRequest):
+    """Move emails to the trash"""
+    result = await gmail_client.call_tool("trash_emails", request.model_dump())
+    return json.loads(result)
+
+@app.post("/api/emails/labels")
+async def modify_labels(request: EmailLabelRequest):
+    """Add or remove labels on emails"""
+    result = await gmail_client.call_tool("modify_labels", request.model_dump())
+    return json.loads(result)
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(message: ChatMessage):
     """Chat with the AI"""
@@ -158,7 +298,7 @@ async def chat(message: ChatMessage):
     
     try:
         
-        response_text = await llm_client.chat(message.message)
+        response_text = await llm_client.chat(message.message, session_id=message.session_id)
         
         print(f"Chat response: {response_text[:100]}...")
         
@@ -0,0 +1,62 @@
+"""
+Bulk label changes: batchModify versus one messages.modify per email.
+
+Archives the same emails in an in-memory mailbox whose every API call takes a
+fixed latency, first through the archive_emails tool (messages.list pages,
+then messages.batchModify 1000 ids at a time), then by listing the same pages
+and sending one messages.modify per email from a thread pool. Reports Gmail
+calls, quota units (Gmail charges 5 per list or modify call and 50 per
+batchModify) and wall time.
+
+    python -m benchmarks.bench_batch_modify [--emails 5000] [--latency 0.02] [--workers 10]
+"""
+import time
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import anyio
+
+from benchmarks.fake_gmail import FakeGmail
+from gmail_mcp import gmail_server
+
+QUOTA_UNITS = {"messages.list": 5, "messages.modify": 5, "messages.batchModify": 50}
+
+
+def report(name: str, gmail: FakeGmail, elapsed: float):
+    calls = sum(gmail.calls.values())
+    units = sum(QUOTA_UNITS.get(endpoint, 0) * count for endpoint, count in gmail.calls.items())
+    print(f"{name:<32}{calls:>8}{units:>10}{elapsed:>10.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--emails", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per Gmail call")
+    parser.add_argument("--workers", type=int, default=10, help="threads for per-email calls")
+    args = parser.parse_args()
+
+    gmail_server.BULK_MODIFY_LIMIT = max(gmail_server.BULK_MODIFY_LIMIT, args.emails)
+
+    print(f"Archiving {args.emails} emails, {args.latency * 1000:.0f} ms per Gmail call\n")
+    print(f"{'':<32}{'calls':>8}{'quota':>10}{'time':>11}")
+
+    gmail = FakeGmail(message_count=args.emails, latency=args.latency)
+    gmail_server.ensure_auth = lambda: gmail
+    start = time.perf_counter()
+    result = json.loads(anyio.run(gmail_server.archive_emails, None, "in:inbox"))
+    report("archive_emails (batchModify)", gmail, time.perf_counter() - start)
+    assert result["data"]["count"] == args.emails
+
+    gmail = FakeGmail(message_count=args.emails, latency=args.latency)
+    start = time.perf_counter()
+    ids, _ = gmail_server.resolve_email_ids(gmail, None, "in:inbox")
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        list(executor.map(lambda email_id: gmail.messages().modify(
+            userId="me", id=email_id, body={"removeLabelIds": ["INBOX"]}
+        ).execute(), ids))
+    report(f"messages.modify x {args.workers} threads", gmail, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Bytes and Gmail API calls per email list refresh.
+
+Runs the sync_emails tool against an in-memory mailbox and, for common
+changes between two refreshes, reports the size of the tool's JSON response
+and the Gmail calls it made: first for a client without a sync token (the
+full list every time), then for a client sending the token from its last
+refresh.
+
+    python -m benchmarks.bench_email_sync [--messages 2000] [--max-results 50]
+"""
+import json
+import argparse
+
+import anyio
+
+from benchmarks.fake_gmail import FakeGmail
+from gmail_mcp import gmail_server
+
+
+def read_listed(gmail: FakeGmail):
+    for email_id in gmail.visible_ids()[:5]:
+        gmail.modify(email_id, remove=["UNREAD"])
+
+
+def label_old(gmail: FakeGmail):
+    for email_id in gmail.visible_ids()[-20:]:
+        gmail.modify(email_id, add=["Label_1"])
+
+
+def autosave_draft(gmail: FakeGmail):
+    for _ in range(5):
+        gmail.delete(gmail.receive(labels=["DRAFT"]))
+
+
+def trash_listed(gmail: FakeGmail):
+    for email_id in gmail.visible_ids()[:3]:
+        gmail.modify(email_id, add=["TRASH"])
+
+
+def restore_trashed(gmail: FakeGmail):
+    for email_id, message in list(gmail.mailbox.items()):
+        if "TRASH" in message["labelIds"]:
+            gmail.modify(email_id, remove=["TRASH"])
+
+
+SCENARIOS = [
+    ("no change", lambda gmail: None),
+    ("1 new email", lambda gmail: gmail.receive()),
+    ("5 listed emails read", read_listed),
+    ("20 old emails labelled", label_old),
+    ("draft autosaved 5 times", autosave_draft),
+    ("3 listed emails trashed", trash_listed),
+    ("3 emails untrashed", restore_trashed),
+]
+
+
+def refresh(gmail: FakeGmail, max_results: int, sync_token: str):
+    gmail.calls.clear()
+    response = anyio.run(gmail_server.sync_emails, max_results, "", sync_token)
+    return json.loads(response), len(response.encode('utf-8')), sum(gmail.calls.values())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--max-results", type=int, default=50)
+    args = parser.parse_args()
+
+    gmail = FakeGmail(message_count=args.messages)
+    gmail_server.ensure_auth = lambda: gmail
+
+    print(f"{args.messages} emails, {args.max_results} listed; response bytes and Gmail calls per refresh\n")
+    print(f"{'change since last refresh':<26}{'full bytes':>12}{'calls':>7}{'sync bytes':>12}{'calls':>7}  result")
+
+    token = refresh(gmail, args.max_results, "")[0]["data"]["sync_token"]
+    for name, change in SCENARIOS:
+        change(gmail)
+
+        _, full_bytes, full_calls = refresh(gmail, args.max_results, "")
+        result, sync_bytes, sync_calls = refresh(gmail, args.max_results, token)
+        data = result["data"]
+        kind = "304" if result["status"] == 304 else "full list" if data["full"] else "delta"
+        print(f"{name:<26}{full_bytes:>12}{full_calls:>7}{sync_bytes:>12}{sync_calls:>7}  {kind}")
+
+        token = data["sync_token"]
+
+
+if __name__ == "__main__":
+    main()
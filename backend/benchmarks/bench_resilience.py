@@ -0,0 +1,108 @@
+"""
+Fault-injection benchmark for retries, circuit breakers and hedged reads.
+
+A fake endpoint answers after a simulated latency with a slow tail and
+fails a share of calls with 503s. Reports the success rate and latency
+percentiles of resilience.call with no retries, with retries, and with
+retries plus hedging.
+
+    python -m benchmarks.bench_resilience [--calls 2000] [--failure-rate 0.05]
+"""
+import time
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from gmail_mcp import resilience
+
+
+class FakeEndpoint:
+
+    def __init__(self, failure_rate: float, latency: float, slow_rate: float, slow_latency: float):
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.random = random.Random(7)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def __call__(self):
+        with self.lock:
+            self.requests += 1
+            slow = self.random.random() < self.slow_rate
+            fail = self.random.random() < self.failure_rate
+
+        time.sleep(self.slow_latency if slow else self.latency)
+        if fail:
+            raise HttpError(httplib2.Response({"status": 503}), b'{"error": {"code": 503}}')
+        return "ok"
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def run(name: str, args, attempts: int, hedge_percentile: float):
+    resilience.RETRY_ATTEMPTS = attempts
+    resilience.HEDGE_PERCENTILE = hedge_percentile
+    resilience._endpoints.clear()
+    breaker = resilience.get_endpoint("bench").breaker
+    breaker.failure_threshold = args.breaker_threshold
+
+    endpoint = FakeEndpoint(args.failure_rate, args.latency, args.slow_rate, args.slow_latency)
+    latencies = []
+    outcomes = {"ok": 0, "error": 0, "circuit open": 0}
+
+    def call(_):
+        started = time.monotonic()
+        try:
+            resilience.call(endpoint, endpoint="bench", hedge=True)
+            outcome = "ok"
+        except HttpError:
+            outcome = "error"
+        except resilience.CircuitOpenError:
+            outcome = "circuit open"
+        latencies.append(time.monotonic() - started)
+        outcomes[outcome] += 1
+
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        list(executor.map(call, range(args.calls)))
+
+    print(f"{name:<22} success {outcomes['ok'] / args.calls:7.2%}   "
+          f"p50 {percentile(latencies, 50) * 1000:6.1f} ms   p99 {percentile(latencies, 99) * 1000:6.1f} ms   "
+          f"requests/call {endpoint.requests / args.calls:4.2f}   circuit open {outcomes['circuit open']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--slow-rate", type=float, default=0.03, help="Share of calls with the slow latency")
+    parser.add_argument("--slow-latency", type=float, default=0.1)
+    parser.add_argument("--breaker-threshold", type=int, default=resilience.BREAKER_FAILURE_THRESHOLD)
+    args = parser.parse_args()
+
+    # Keep backoff short relative to the simulated latencies
+    resilience.RETRY_BASE_DELAY = args.latency
+    resilience.RETRY_MAX_DELAY = args.latency * 4
+    # Retry messages are not part of the report
+    resilience.print = lambda *a, **k: None
+
+    print(f"{args.calls} calls, {args.failure_rate:.0%} injected 503s, "
+          f"{args.slow_rate:.0%} of calls take {args.slow_latency * 1000:.0f} ms instead of {args.latency * 1000:.0f} ms\n")
+
+    run("no retries", args, attempts=1, hedge_percentile=0)
+    run("3 attempts", args, attempts=3, hedge_percentile=0)
+    run("3 attempts, hedge p95", args, attempts=3, hedge_percentile=95)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Semantic index benchmark: build throughput, query latency and matrix memory.
+
+Builds a SemanticIndex over a synthetic corpus through add_many, in batches
+the size of an email list page, then times search for random queries.
+
+    python -m benchmarks.bench_semantic_index [--messages 50000] [--batch 100] [--queries 1000]
+"""
+import time
+import random
+import argparse
+
+from gmail_mcp.semantic_index import SemanticIndex, _word_features
+
+SUBJECTS = [
+    "invoice", "contract", "renewal", "meeting", "lunch", "quarterly", "report", "payment", "shipping",
+    "order", "receipt", "travel", "booking", "flight", "hotel", "newsletter", "security", "password",
+    "reset", "review", "deadline", "budget", "proposal", "interview", "offer", "holiday", "schedule",
+    "project", "update", "release", "deployment", "incident", "outage", "migration", "database",
+    "customer", "support", "ticket", "refund", "subscription", "lease", "office", "team", "feedback",
+]
+FILLER = [
+    "the", "for", "please", "find", "attached", "regarding", "our", "your", "next", "week", "let",
+    "know", "thanks", "best", "regards", "about", "with", "from", "this", "that", "will", "have",
+]
+
+
+def synthetic_email(rng: random.Random, number: int) -> str:
+    subject = " ".join(rng.sample(SUBJECTS, 3))
+    sender = f"sender{rng.randrange(500)}@example{rng.randrange(50)}.com"
+    words = rng.choices(SUBJECTS + FILLER * 2, k=rng.randint(15, 40))
+    return f"{subject} #{number}\n{sender}\n{' '.join(words)}"
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=50_000)
+    parser.add_argument("--batch", type=int, default=100, help="messages per add_many call")
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    corpus = [(f"{number:016x}", synthetic_email(rng, number)) for number in range(args.messages)]
+    _word_features.cache_clear()
+
+    index = SemanticIndex()
+    start = time.perf_counter()
+    for offset in range(0, len(corpus), args.batch):
+        index.add_many(corpus[offset:offset + args.batch])
+    build = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(args.queries):
+        query = " ".join(rng.sample(SUBJECTS, 2))
+        start = time.perf_counter()
+        index.search(query, top_k=5)
+        latencies.append(time.perf_counter() - start)
+
+    used = len(index) * index.dim * index.vectors.itemsize
+    print(f"{args.messages} messages, {index.dim} dimensions, add_many batches of {args.batch}\n")
+    print(f"build:  {build:.2f}s ({args.messages / build:,.0f} messages/s)")
+    print(f"search: p50 {percentile(latencies, 50) * 1000:.2f} ms, p99 {percentile(latencies, 99) * 1000:.2f} ms")
+    print(f"matrix: {index.vectors.nbytes / 2**20:.0f} MB allocated, {used / 2**20:.0f} MB in use "
+          f"({len(index.vectors)} rows)")
+
+
+if __name__ == "__main__":
+    main()
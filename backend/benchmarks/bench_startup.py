@@ -0,0 +1,58 @@
+"""
+API startup benchmark: time to import app.py and until it is ready to serve.
+
+Each run is a fresh interpreter that imports app, runs its startup handlers
+(which start and initialize the MCP server) and shuts down again.
+
+    python -m benchmarks.bench_startup [--runs 5]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+RUN_ONCE = """
+import time, json, asyncio, contextlib, io
+started = time.perf_counter()
+
+async def serve():
+    async with app.app.router.lifespan_context(app.app):
+        return time.perf_counter()
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+    imported = time.perf_counter()
+    ready = asyncio.run(serve())
+print(json.dumps({"import": imported - started, "ready": ready - started}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # A key lets the LLM client be constructed, as in a normal deployment
+    env = {**os.environ, "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY", "benchmark")}
+
+    timings = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, "-c", RUN_ONCE], cwd=BACKEND_DIR, env=env,
+            capture_output=True, text=True, check=True
+        ).stdout
+        timings.append(json.loads(output.strip().splitlines()[-1]))
+
+    for key, label in (("import", "import app"), ("ready", "import to ready")):
+        values = [timing[key] for timing in timings]
+        print(f"{label:<16} median {statistics.median(values) * 1000:7.0f} ms   "
+              f"min {min(values) * 1000:7.0f} ms   max {max(values) * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
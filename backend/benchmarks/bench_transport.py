@@ -0,0 +1,142 @@
+"""
+Gmail transport benchmark: throughput and TLS handshakes per transport.
+
+Runs messages.get calls through googleapiclient, from one thread and from
+several, against a local HTTPS server that imitates the Gmail API, and
+counts the TLS handshakes that server accepts. Needs the openssl CLI for a
+self-signed certificate.
+
+    python -m benchmarks.bench_transport [--threads 8] [--requests 400] [--latency 0.005]
+"""
+import ssl
+import time
+import json
+import argparse
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+
+import httplib2
+import google_auth_httplib2
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+from gmail_mcp.transport import PooledHttp
+
+
+class FakeGmailHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; don't let Nagle delay the body
+    disable_nagle_algorithm = True
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        body = json.dumps({
+            "id": self.path.rsplit('/', 1)[-1].split('?')[0],
+            "payload": {"headers": [{"name": "Subject", "value": "Hello"}]}
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeGmailServer(ThreadingHTTPServer):
+    """HTTPS server that counts completed TLS handshakes"""
+    daemon_threads = True
+
+    def __init__(self, context: ssl.SSLContext):
+        super().__init__(("127.0.0.1", 0), FakeGmailHandler)
+        self.context = context
+        self.handshakes = 0
+        self.lock = threading.Lock()
+
+    def get_request(self):
+        sock, address = self.socket.accept()
+        return self.context.wrap_socket(sock, server_side=True, do_handshake_on_connect=False), address
+
+    def finish_request(self, request, client_address):
+        request.do_handshake()
+        with self.lock:
+            self.handshakes += 1
+        super().finish_request(request, client_address)
+
+
+def make_certificate(directory: Path) -> Path:
+    cert = directory / "cert.pem"
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+         "-keyout", str(cert), "-out", str(cert)],
+        check=True, capture_output=True
+    )
+    return cert
+
+
+def run(name: str, make_service, server: FakeGmailServer, threads: int, total: int):
+    """Send ``total`` messages.get calls from ``threads`` threads, one service per thread"""
+    local = threading.local()
+
+    def call(i):
+        if not hasattr(local, 'service'):
+            local.service = make_service()
+        local.service.users().messages().get(userId="me", id=f"m{i}", format="metadata").execute()
+
+    server.handshakes = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(call, range(total)))
+    elapsed = time.perf_counter() - started
+
+    print(f"{name:<40} {total / elapsed:8.0f} req/s  {server.handshakes:5d} TLS handshakes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=400, help="Total requests per transport")
+    parser.add_argument("--latency", type=float, default=0.005, help="Simulated server latency in seconds")
+    args = parser.parse_args()
+
+    FakeGmailHandler.latency = args.latency
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert = make_certificate(Path(directory))
+        context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        context.load_cert_chain(cert)
+
+        server = FakeGmailServer(context)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        endpoint = f"https://127.0.0.1:{server.server_address[1]}"
+        credentials = Credentials(token="benchmark")
+
+        def gmail(http):
+            return build('gmail', 'v1', http=http, client_options={"api_endpoint": endpoint},
+                         cache_discovery=False)
+
+        def httplib2_service():
+            return gmail(google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http(ca_certs=str(cert))))
+
+        print(f"{args.requests} requests, {args.latency * 1000:.0f} ms simulated server latency\n")
+
+        # httplib2 is not thread-safe: one shared service means serial calls
+        run("httplib2, one shared service (serial)", httplib2_service, server, 1, args.requests)
+        run(f"httplib2, service per thread ({args.threads})", httplib2_service, server, args.threads, args.requests)
+        for threads in (1, args.threads):
+            pooled = PooledHttp(credentials, ca_certs=str(cert))
+            name = f"pooled, shared transport ({threads if threads > 1 else 'serial'})"
+            run(name, lambda: gmail(pooled), server, threads, args.requests)
+            pooled.close()
+
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+In-memory Gmail mailbox behind the parts of the googleapiclient Gmail service
+the MCP server uses. Counts API calls per endpoint and records history like
+Gmail does, so sync, bulk-modify and large-message code paths can be measured
+and tested without a Google account.
+"""
+import time
+import json
+import base64
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+HIDDEN_LABELS = {"TRASH", "SPAM"}
+HISTORY_PAGE_SIZE = 100
+
+
+class FakeRequest:
+
+    def __init__(self, gmail: "FakeGmail", endpoint: str, handler: Callable[[], Any]):
+        self.gmail = gmail
+        self.endpoint = endpoint
+        self.handler = handler
+
+    def execute(self):
+        with self.gmail.lock:
+            self.gmail.calls[self.endpoint] += 1
+        if self.gmail.latency:
+            time.sleep(self.gmail.latency)
+        with self.gmail.lock:
+            return self.handler()
+
+
+def not_found(message: str) -> HttpError:
+    content = json.dumps({"error": {"code": 404, "message": message}}).encode()
+    return HttpError(httplib2.Response({"status": 404}), content)
+
+
+class FakeGmail:
+
+    def __init__(self, message_count: int = 0, latency: float = 0.0):
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.lock = threading.RLock()
+        self.mailbox: Dict[str, Dict[str, Any]] = {}
+        self.records: List[Dict[str, Any]] = []
+        self.history_id = 1000
+        self.oldest_history_id = self.history_id
+        self.user_labels = {"Label_1": "Work"}
+        self.next_id = 0
+        self.attachments: Dict[str, str] = {}
+
+        for _ in range(message_count):
+            self.receive()
+
+    # Mailbox changes, recorded in the history like Gmail does
+
+    def receive(self, subject: Optional[str] = None, labels: Optional[List[str]] = None,
+                body: str = "", timestamp: Optional[int] = None) -> str:
+        with self.lock:
+            self.next_id += 1
+            email_id = f"{self.next_id:016x}"
+            self.mailbox[email_id] = {
+                "id": email_id,
+                "threadId": email_id,
+                "labelIds": list(labels or ["INBOX", "UNREAD"]),
+                "internalDate": str(timestamp if timestamp is not None else 1_700_000_000_000 + self.next_id * 1000),
+                "snippet": body[:100],
+                "payload": {
+                    "mimeType": "text/plain",
+                    "headers": [
+                        {"name": "Subject", "value": subject or f"Message {self.next_id}"},
+                        {"name": "From", "value": f"sender{self.next_id % 7}@example.com"},
+                        {"name": "Date", "value": "Mon, 19 Oct 2026 08:00:00 +0000"},
+                    ],
+                    "body": self._body(body),
+                },
+            }
+            self._record("messagesAdded", email_id)
+            return email_id
+
+    def delete(self, email_id: str):
+        with self.lock:
+            self._record("messagesDeleted", email_id)
+            del self.mailbox[email_id]
+
+    def modify(self, email_id: str, add: List[str] = (), remove: List[str] = ()):
+        with self.lock:
+            labels = self.mailbox[email_id]["labelIds"]
+            added = [label for label in add if label not in labels]
+            removed = [label for label in remove if label in labels]
+            labels.extend(added)
+            for label in removed:
+                labels.remove(label)
+            if added:
+                self._record("labelsAdded", email_id, added)
+            if removed:
+                self._record("labelsRemoved", email_id, removed)
+
+    def expire_history(self):
+        """Forget all history, as Gmail does after about a week"""
+        with self.lock:
+            self.records = []
+            self.oldest_history_id = self.history_id
+
+    def visible_ids(self) -> List[str]:
+        """Ids of emails outside trash and spam, newest first, as messages.list orders them"""
+        with self.lock:
+            visible = [message for message in self.mailbox.values() if not HIDDEN_LABELS & set(message["labelIds"])]
+            visible.sort(key=lambda message: int(message["internalDate"]), reverse=True)
+            return [message["id"] for message in visible]
+
+    def _body(self, text: str) -> Dict[str, Any]:
+        data = base64.urlsafe_b64encode(text.encode('utf-8')).decode('ascii')
+        return {"size": len(text.encode('utf-8')), "data": data}
+
+    def _record(self, history_type: str, email_id: str, label_ids: Optional[List[str]] = None):
+        self.history_id += 1
+        message = self.mailbox[email_id]
+        item = {"message": {"id": email_id, "threadId": message["threadId"], "labelIds": list(message["labelIds"])}}
+        if label_ids is not None:
+            item["labelIds"] = label_ids
+        self.records.append({"id": str(self.history_id), history_type: [item]})
+
+    # googleapiclient surface: service.users().messages().get(...).execute()
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return FakeMessages(self)
+
+    def labels(self):
+        return FakeLabels(self)
+
+    def getProfile(self, userId: str):
+        return FakeRequest(self, "users.getProfile", lambda: {
+            "emailAddress": "me@example.com",
+            "historyId": str(self.history_id),
+            "messagesTotal": len(self.mailbox),
+        })
+
+    def history(self):
+        return FakeHistory(self)
+
+
+class FakeMessages:
+
+    def __init__(self, gmail: FakeGmail):
+        self.gmail = gmail
+
+    def list(self, userId: str, maxResults: int = 100, q: str = "", pageToken: Optional[str] = None):
+        def handler():
+            visible = self.gmail.visible_ids()
+            start = int(pageToken or 0)
+            page = visible[start:start + maxResults]
+            response = {
+                "messages": [{"id": email_id, "threadId": email_id} for email_id in page],
+                "resultSizeEstimate": len(visible),
+            }
+            if start + maxResults < len(visible):
+                response["nextPageToken"] = str(start + maxResults)
+            return response
+
+        return FakeRequest(self.gmail, "messages.list", handler)
+
+    def get(self, userId: str, id: str, format: str = "full", metadataHeaders: Optional[List[str]] = None):
+        def handler():
+            message = self.gmail.mailbox.get(id)
+            if message is None:
+                raise not_found("Requested entity was not found.")
+            if format == "metadata":
+                payload = {"mimeType": message["payload"]["mimeType"], "headers": [
+                    header for header in message["payload"]["headers"]
+                    if not metadataHeaders or header["name"] in metadataHeaders
+                ]}
+                return {**message, "payload": payload}
+            return message
+
+        return FakeRequest(self.gmail, "messages.get", handler)
+
+    def modify(self, userId: str, id: str, body: Dict[str, Any]):
+        def handler():
+            self.gmail.modify(id, body.get("addLabelIds", []), body.get("removeLabelIds", []))
+            return {"id": id}
+
+        return FakeRequest(self.gmail, "messages.modify", handler)
+
+    def batchModify(self, userId: str, body: Dict[str, Any]):
+        def handler():
+            if len(body["ids"]) > 1000:
+                raise HttpError(httplib2.Response({"status": 400}), b'{"error": {"code": 400}}')
+            for email_id in body["ids"]:
+                if email_id in self.gmail.mailbox:
+                    self.gmail.modify(email_id, body.get("addLabelIds", []), body.get("removeLabelIds", []))
+            return ""
+
+        return FakeRequest(self.gmail, "messages.batchModify", handler)
+
+    def attachments(self):
+        return FakeAttachments(self.gmail)
+
+
+class FakeAttachments:
+
+    def __init__(self, gmail: FakeGmail):
+        self.gmail = gmail
+
+    def get(self, userId: str, messageId: str, id: str):
+        def handler():
+            data = self.gmail.attachments.get(id)
+            if data is None:
+                raise not_found("Invalid attachment token")
+            return {"size": len(data) * 3 // 4, "data": data}
+
+        return FakeRequest(self.gmail, "messages.attachments.get", handler)
+
+
+class FakeLabels:
+
+    def __init__(self, gmail: FakeGmail):
+        self.gmail = gmail
+
+    def list(self, userId: str):
+        return FakeRequest(self.gmail, "labels.list", lambda: {"labels": [
+            {"id": label_id, "name": name, "type": "user"} for label_id, name in self.gmail.user_labels.items()
+        ]})
+
+
+class FakeHistory:
+
+    def __init__(self, gmail: FakeGmail):
+        self.gmail = gmail
+
+    def list(self, userId: str, startHistoryId: str, historyTypes: Optional[List[str]] = None,
+             pageToken: Optional[str] = None):
+        def handler():
+            if int(startHistoryId) < self.gmail.oldest_history_id:
+                raise not_found("Requested entity was not found.")
+
+            records = [record for record in self.gmail.records if int(record["id"]) > int(startHistoryId)]
+            start = int(pageToken or 0)
+            response = {"history": records[start:start + HISTORY_PAGE_SIZE], "historyId": str(self.gmail.history_id)}
+            if start + HISTORY_PAGE_SIZE < len(records):
+                response["nextPageToken"] = str(start + HISTORY_PAGE_SIZE)
+            return response
+
+        return FakeRequest(self.gmail, "history.list", handler)
@@ -1,20 +1,45 @@
+import os
 import json
+import time
+import asyncio
+import threading
 import subprocess
+from collections import deque
 from typing import Optional
-from typing import Dict, Any
-from google_auth_oauthlib.flow import Flow
+from typing import Dict, Any, List, Tuple
+from state import state_backend
+import tracing
 
-oauth_flow: Optional[Flow] = None
+# Read-only tools whose results are shared between API workers through the
+# state backend, with how long (in seconds) a cached result stays valid
+TOOL_CACHE_TTL = int(os.getenv('TOOL_CACHE_TTL', '300'))
+CACHEABLE_TOOLS = {
+    'read_email': TOOL_CACHE_TTL
+}
 
-mcp_process: Optional[subprocess.Popen] = None
+# Seconds to wait for the MCP server to answer a request before giving up on it
+REQUEST_TIMEOUT = float(os.getenv('GMAIL_MCP_REQUEST_TIMEOUT', '120'))
 
 class GmailClient:
 
-    def __init__(self):
+    def __init__(self, command: Optional[List[str]] = None):
+        self.command = command
         self.process: Optional[subprocess.Popen] = None
         self.request_id = 0
         self.initialized = False
 
+        # Requests are multiplexed over the one stdio connection: a reader
+        # thread matches each response line to its waiting future by id.
+        self.pending: Dict[int, Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self.pending_lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.reader_thread: Optional[threading.Thread] = None
+
+        # The server logs to stderr (stdout carries JSON-RPC); it is drained
+        # continuously so a full pipe can't block the server
+        self.stderr_thread: Optional[threading.Thread] = None
+        self.stderr_tail: deque = deque(maxlen=50)
+
     def start(self):
         if self.process:
             return
@@ -28,7 +53,7 @@ class GmailClient:
         print(f"Starting MCP server from: {cwd}")
 
         self.process = subprocess.Popen(
-            [sys.executable, '-m', 'gmail_mcp.gmail_server'],
+            self.command or [sys.executable, '-m', 'gmail_mcp.gmail_server'],
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
@@ -38,7 +63,6 @@ class GmailClient:
         )
 
         # Check if process started successfully
-        import time
         time.sleep(0.5)  # Give it a moment to start
 
         if self.process.poll() is not None:
@@ -49,6 +73,12 @@ class GmailClient:
         # Initialize the MCP connection
         self._initialize()
 
+        self.reader_thread = threading.Thread(target=self._read_responses, daemon=True)
+        self.reader_thread.start()
+
+        self.stderr_thread = threading.Thread(target=self._read_stderr, daemon=True)
+        self.stderr_thread.start()
+
     def _initialize(self):
         """Initialize the MCP connection"""
         if self.initialized:
@@ -100,50 +130,164 @@ class GmailClient:
         self.initialized = True
         print("MCP connection initialized successfully")
 
+    def _read_responses(self):
+        """Dispatch response lines from the MCP server to their waiting callers"""
+        process = self.process
+
+        for line in iter(process.stdout.readline, b''):
+            try:
+                response = json.loads(line.decode('utf-8'))
+            except ValueError:
+                print(f"Ignoring non-JSON output from MCP server: {line[:200]!r}")
+                continue
+
+            with self.pending_lock:
+                entry = self.pending.pop(response.get('id'), None)
+
+            if entry is None:
+                continue
+
+            loop, future = entry
+            loop.call_soon_threadsafe(self._set_future_result, future, response)
+
+        # The server has exited: fail everything still waiting on it
+        with self.pending_lock:
+            pending, self.pending = self.pending, {}
+
+        for loop, future in pending.values():
+            loop.call_soon_threadsafe(
+                self._set_future_exception, future, Exception("MCP server has terminated")
+            )
+
+    def _read_stderr(self):
+        """Echo the MCP server's log output, keeping the last lines for error messages"""
+        process = self.process
+
+        for line in iter(process.stderr.readline, b''):
+            text = line.decode('utf-8', errors='replace').rstrip()
+            self.stderr_tail.append(text)
+            print(f"[MCP server] {text}")
+
+    @staticmethod
+    def _set_future_result(future: asyncio.Future, response: Dict[str, Any]):
+        if not future.done():
+            future.set_result(response)
+
+    @staticmethod
+    def _set_future_exception(future: asyncio.Future, error: Exception):
+        if not future.done():
+            future.set_exception(error)
+
+    async def _request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a JSON-RPC request and wait for its response without blocking other requests"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        with self.pending_lock:
+            self.request_id += 1
+            request_id = self.request_id
+            self.pending[request_id] = (loop, future)
+
+        request = {
+            'jsonrpc': '2.0',
+            'id': request_id,
+            'method': method,
+            'params': params
+        }
+
+        request_str = json.dumps(request) + '\n'
+        print(f"Sending request: {request_str.strip()}")
+
+        try:
+            with self.write_lock:
+                self.process.stdin.write(request_str.encode('utf-8'))
+                self.process.stdin.flush()
+        except Exception:
+            with self.pending_lock:
+                self.pending.pop(request_id, None)
+            raise
+
+        try:
+            response = await asyncio.wait_for(future, REQUEST_TIMEOUT)
+        except asyncio.TimeoutError:
+            # A late response for this id is dropped by the reader thread
+            with self.pending_lock:
+                self.pending.pop(request_id, None)
+            raise TimeoutError(f"MCP server did not answer {method} within {REQUEST_TIMEOUT:.0f}s")
+
+        print(f"Received response: {json.dumps(response)[:500]}")
+
+        return response
+
     def stop(self):
         if self.process:
             self.process.terminate()
             self.process.wait()
             self.process = None
+            self.initialized = False
+        if self.reader_thread:
+            self.reader_thread.join(timeout=1)
+            self.reader_thread = None
+        if self.stderr_thread:
+            self.stderr_thread.join(timeout=1)
+            self.stderr_thread = None
     
-    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict:
+    async def list_tools(self) -> List[Dict[str, Any]]:
+        """Return the MCP server's tool definitions (name, description, inputSchema)"""
         if not self.process:
             self.start()
 
-        # Check if process is still running
-        if self.process.poll() is not None:
-            stderr = self.process.stderr.read().decode('utf-8')
-            raise Exception(f"MCP server has terminated. Error: {stderr}")
+        response = await self._request('tools/list', {})
 
-        self.request_id += 1
+        if 'error' in response:
+            raise Exception(response['error']['message'])
 
-        request = {
-            'jsonrpc': '2.0',
-            'id': self.request_id,
-            'method': 'tools/call',
-            'params': {
-                'name': tool_name,
-                'arguments': arguments
-            }
-        }
+        return response['result']['tools']
 
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict:
+        start = time.monotonic()
         try:
-            request_str = json.dumps(request) + '\n'
-            print(f"Sending request: {request_str.strip()}")
+            result = await self._call_tool(tool_name, arguments)
+        except Exception as e:
+            tracing.record("tool_call", name=tool_name, arguments=arguments, error=str(e),
+                           duration=round(time.monotonic() - start, 4))
+            raise
+
+        tracing.record("tool_call", name=tool_name, arguments=arguments, result=result,
+                       duration=round(time.monotonic() - start, 4))
+        return result
 
-            self.process.stdin.write(request_str.encode('utf-8'))
-            self.process.stdin.flush()
+    async def _call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Dict:
+        cache_key = None
+        cache_ttl = CACHEABLE_TOOLS.get(tool_name)
+        if cache_ttl:
+            cache_key = f"tool:{tool_name}:{json.dumps(arguments, sort_keys=True)}"
+            cached = await state_backend.aget(cache_key)
+            if cached is not None:
+                return cached
+
+        if not self.process:
+            self.start()
 
-            response_line = self.process.stdout.readline().decode('utf-8')
-            print(f"Received response: {response_line.strip()}")
+        # Check if process is still running
+        if self.process.poll() is not None:
+            stderr = "\n".join(self.stderr_tail)
+            raise Exception(f"MCP server has terminated. Error: {stderr}")
 
-            response = json.loads(response_line)
+        try:
+            response = await self._request('tools/call', {
+                'name': tool_name,
+                'arguments': arguments
+            })
 
             if 'error' in response:
                 raise Exception(response['error']['message'])
 
             result = response['result']['content'][0]['text']
 
+            if cache_key and json.loads(result).get('status') == 200:
+                await state_backend.aset(cache_key, result, ttl=cache_ttl)
+
             return result
         except Exception as e:
             # Try to read stderr for more context
@@ -1,51 +1,102 @@
+import sys
 import pickle
+import threading
 from pathlib import Path
+from typing import Callable, List
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
-
-gmail_service = None
+from .transport import build_http, close_http
 
 TOKEN_PATH = Path.home() / '.gmail_mcp_token.pickle'
 
-def get_gmail_service():
-    global gmail_service
-    
-    if gmail_service:
-        return gmail_service
-    
-    credentials = None
-
-    if TOKEN_PATH.exists():
+# Credentials are shared by the whole process and reloaded whenever the token
+# file changes (login/logout happen in the API process). googleapiclient
+# service objects are not thread-safe, so each worker thread builds its own.
+_credentials = None
+_credentials_mtime = None
+_credentials_lock = threading.Lock()
+_local = threading.local()
+_credential_listeners: List[Callable[[], None]] = []
+
+def on_credentials_change(callback: Callable[[], None]):
+    """Call ``callback`` whenever the saved credentials are replaced or removed"""
+    _credential_listeners.append(callback)
+
+def _load_credentials():
+    global _credentials, _credentials_mtime
+
+    with _credentials_lock:
+        try:
+            mtime = TOKEN_PATH.stat().st_mtime_ns
+        except FileNotFoundError:
+            if _credentials_mtime is not None:
+                _notify_credentials_change()
+            _credentials = None
+            _credentials_mtime = None
+            return None
+
+        if _credentials and mtime == _credentials_mtime:
+            return _credentials
+
+        # A new login (possibly another account) replaced the token we had
+        replaced = _credentials_mtime is not None and mtime != _credentials_mtime
+        credentials = None
+
         try:
             with open(TOKEN_PATH, 'rb') as token:
                 credentials = pickle.load(token)
         except Exception as e:
-            print(f'Error loading token: {e}')
-
-    if credentials:
-        if credentials.expired and credentials.refresh_token:
-            try:
-                credentials.refresh(Request())
-                with open(TOKEN_PATH, 'wb') as token:
-                    pickle.dump(credentials, token)
-            except Exception as e:
-                credentials = None
-                print(f'Error refreshing token: {e}')
-    
-    if credentials and credentials.valid:
-        return build('gmail', 'v1', credentials=credentials)
-    
-    return None
+            print(f'Error loading token: {e}', file=sys.stderr)
+
+        if credentials:
+            if credentials.expired and credentials.refresh_token:
+                try:
+                    credentials.refresh(Request())
+                    with open(TOKEN_PATH, 'wb') as token:
+                        pickle.dump(credentials, token)
+                    mtime = TOKEN_PATH.stat().st_mtime_ns
+                except Exception as e:
+                    credentials = None
+                    print(f'Error refreshing token: {e}', file=sys.stderr)
+
+        if credentials and credentials.valid:
+            _credentials = credentials
+            _credentials_mtime = mtime
+        else:
+            _credentials = None
+            _credentials_mtime = None
+
+        if replaced:
+            _notify_credentials_change()
+
+        return _credentials
+
+def _notify_credentials_change():
+    for callback in _credential_listeners:
+        callback()
+
+def get_gmail_service():
+    credentials = _load_credentials()
+    if not credentials:
+        return None
+
+    if getattr(_local, 'credentials', None) is not credentials:
+        _local.service = build('gmail', 'v1', http=build_http(credentials))
+        _local.credentials = credentials
+
+    return _local.service
 
 def save_credentials(credentials: Credentials):
 
-    global gmail_service
+    global _credentials, _credentials_mtime
 
-    with open(TOKEN_PATH, 'wb') as token:
-        pickle.dump(credentials, token)
-    
-    gmail_service = build('gmail', 'v1', credentials=credentials)
+    with _credentials_lock:
+        with open(TOKEN_PATH, 'wb') as token:
+            pickle.dump(credentials, token)
+
+        _credentials = credentials
+        _credentials_mtime = TOKEN_PATH.stat().st_mtime_ns
 
 
 def ensure_auth():
@@ -56,10 +107,14 @@ def ensure_auth():
 
 def logout():
     """Clear authentication credentials"""
-    global gmail_service
-    gmail_service = None
+    global _credentials, _credentials_mtime
+
+    with _credentials_lock:
+        _credentials = None
+        _credentials_mtime = None
+        close_http()
 
-    if TOKEN_PATH.exists():
-        TOKEN_PATH.unlink()
-        return True
-    return False
\ No newline at end of file
+        if TOKEN_PATH.exists():
+            TOKEN_PATH.unlink()
+            return True
+        return False
@@ -0,0 +1,66 @@
+import os
+import json
+import functools
+from typing import Optional
+import anyio
+import anyio.to_thread
+
+# Total worker threads shared by all tools, and how many calls per tool may
+# wait for a slot before new calls are rejected.
+MAX_WORKERS = int(os.getenv('GMAIL_MCP_MAX_WORKERS', '8'))
+QUEUE_LIMIT = int(os.getenv('GMAIL_MCP_QUEUE_LIMIT', '16'))
+
+_worker_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def _get_worker_limiter() -> anyio.CapacityLimiter:
+    global _worker_limiter
+
+    if _worker_limiter is None:
+        _worker_limiter = anyio.CapacityLimiter(MAX_WORKERS)
+    return _worker_limiter
+
+
+def offload(concurrency: int = 4):
+    """Run a blocking MCP tool in the shared worker thread pool.
+
+    FastMCP awaits async tools concurrently but runs sync tools on the event
+    loop, so one slow Gmail call would block every other request. The wrapped
+    tool runs in a worker thread, at most ``concurrency`` at a time (override
+    with ``GMAIL_MCP_CONCURRENCY_<TOOL_NAME>``). Once ``QUEUE_LIMIT`` further
+    calls are waiting, new calls get a 503 response instead of queueing.
+    """
+
+    def decorator(fn):
+        name = fn.__name__
+        limit = int(os.getenv(f'GMAIL_MCP_CONCURRENCY_{name.upper()}', concurrency))
+        tool_limiter: Optional[anyio.CapacityLimiter] = None
+        pending = 0
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            nonlocal tool_limiter, pending
+
+            if pending >= limit + QUEUE_LIMIT:
+                return json.dumps({
+                    "status": 503,
+                    "message": f"Server busy: too many concurrent {name} calls, please retry",
+                    "data": None
+                })
+
+            if tool_limiter is None:
+                tool_limiter = anyio.CapacityLimiter(limit)
+
+            pending += 1
+            try:
+                async with tool_limiter:
+                    return await anyio.to_thread.run_sync(
+                        functools.partial(fn, *args, **kwargs),
+                        limiter=_get_worker_limiter()
+                    )
+            finally:
+                pending -= 1
+
+        return wrapper
+
+    return decorator
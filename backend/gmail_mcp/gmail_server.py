@@ -1,16 +1,60 @@
+import os
 import json
 import base64
-from typing import Optional
+from typing import Annotated, Any, Callable, Dict, List, Optional, Tuple
 from email.mime.text import MIMEText
+from pydantic import Field
 from mcp.server.fastmcp import FastMCP
 from googleapiclient.errors import HttpError
-from .auth import get_gmail_service, ensure_auth
+from googleapiclient.http import HttpRequest
+from . import resilience
+from .auth import get_gmail_service, ensure_auth, on_credentials_change
+from .concurrency import offload
+from .semantic_index import email_index
+from .messages import get_headers, find_body, extract_body, get_attachments
+from .spool import INLINE_BODY_LIMIT, decode_chunks, decode_prefix, write_spool
+from .summarizer import thread_summarizer
+from .transport import HTTP_TRANSPORT
 
 mcp = FastMCP("Gmail MCP Server")
 
+# The index only holds the signed-in account's emails
+on_credentials_change(email_index.clear)
+
+# Emails with these labels are not part of the email list
+HIDDEN_LABELS = {"TRASH", "SPAM"}
+# Past this many label changes a delta is no smaller than the full list
+MAX_DELTA_CHANGES = 500
+
+# messages.batchModify accepts at most 1000 ids per call; a search query may
+# select up to GMAIL_BULK_MODIFY_LIMIT emails
+BATCH_MODIFY_SIZE = 1000
+BULK_MODIFY_LIMIT = int(os.getenv('GMAIL_BULK_MODIFY_LIMIT', '5000'))
+
+SYSTEM_LABELS = {"INBOX", "UNREAD", "STARRED", "IMPORTANT", "TRASH", "SPAM", "SENT", "DRAFT"}
+
+def execute(build_request: Callable[[], HttpRequest], endpoint: str, idempotent: bool = True,
+            hedge: bool = True) -> Dict[str, Any]:
+    """Execute a Gmail API request with retries and a circuit breaker per endpoint.
+
+    ``build_request`` creates a fresh request for every attempt. Reads may be
+    hedged, which is only safe with the thread-safe pooled transport; pass
+    ``hedge=False`` for idempotent writes.
+    """
+    return resilience.call(
+        lambda: build_request().execute(),
+        endpoint=f"gmail.{endpoint}",
+        idempotent=idempotent,
+        hedge=hedge and HTTP_TRANSPORT == 'pooled'
+    )
+
 @mcp.tool()
+@offload(concurrency=8)
 def get_auth_status() -> str:
-    """Check if the user is authenticated with Gmail."""
+    """Check if the user is authenticated with Gmail.
+
+    ONLY use this when the user explicitly asks about authentication status or before performing Gmail operations.
+    """
 
     service = get_gmail_service()
     return json.dumps({
@@ -19,37 +63,40 @@ def get_auth_status() -> str:
     })
 
 @mcp.tool()
-def list_emails(max_results: int = 10, query: Optional[str] = "") -> str:
-    """List emails from the user's Gmail account."""
+@offload()
+def list_emails(
+    max_results: Annotated[int, Field(description="Maximum number of emails to return (1-100). Default is 10.")] = 10,
+    query: Annotated[Optional[str], Field(description=(
+        "Gmail search query to filter emails. Examples:\n"
+        "- 'is:unread' for unread emails\n"
+        "- 'from:user@example.com' for emails from specific sender\n"
+        "- 'subject:meeting' for emails with 'meeting' in subject\n"
+        "- 'has:attachment' for emails with attachments\n"
+        "- 'after:2024/01/01' for emails after a date\n"
+        "- Empty string for all emails"
+    ))] = ""
+) -> str:
+    """List emails from the user's Gmail inbox.
+
+    ONLY use this when the user explicitly asks to see, list, check, or search their emails.
+    DO NOT use for greetings, general questions, or casual conversation.
+    Supports Gmail search query syntax for filtering.
+    """
 
     service = ensure_auth()
     try:
-        results = service.users().messages().list(
+        results = execute(lambda: service.users().messages().list(
             userId="me",
             maxResults=min(max_results, 100),
             q=query
-        ).execute()
+        ), "messages.list")
 
         messages = results.get("messages", [])
 
         if not messages:
             return json.dumps({"status": 200, "message": "No emails found", "data": {"count": 0, "messages": []}})
 
-        email_data = []
-        for message in messages:
-            message_data = service.users().messages().get(
-                userId="me",
-                id=message["id"],
-                format="metadata",
-                metadataHeaders=["Subject", "From", "Date"]
-            ).execute()
-            headers = {header["name"]: header["value"] for header in message_data["payload"]["headers"]}
-            email_data.append({
-                "id": message["id"],
-                "from": headers.get("From", ""),
-                "subject": headers.get("Subject", ""),
-                "date": headers.get("Date", "")
-            })
+        email_data = get_email_metadata(service, [message["id"] for message in messages])
 
         return json.dumps({
             "status": 200,
@@ -66,37 +113,220 @@ def list_emails(max_results: int = 10, query: Optional[str] = "") -> str:
     except Exception as error:
         return json.dumps({"status": 500, "message": f"An error occurred: {error}" ,"data": str(error)})
     
+def get_email_metadata(service, email_ids: List[str]) -> List[Dict[str, Any]]:
+    """Fetch sender, subject, date, labels and received time for emails and add them to the semantic index"""
+    email_data = []
+    indexed = []
+    for email_id in email_ids:
+        message_data = execute(lambda: service.users().messages().get(
+            userId="me",
+            id=email_id,
+            format="metadata",
+            metadataHeaders=["Subject", "From", "Date"]
+        ), "messages.get")
+        headers = get_headers(message_data)
+        email_data.append({
+            "id": email_id,
+            "from": headers.get("From", ""),
+            "subject": headers.get("Subject", ""),
+            "date": headers.get("Date", ""),
+            "labels": message_data.get("labelIds", []),
+            "timestamp": int(message_data.get("internalDate", 0))
+        })
+        indexed.append((
+            email_id,
+            f"{headers.get('Subject', '')}\n{headers.get('From', '')}\n{message_data.get('snippet', '')}"
+        ))
+
+    email_index.add_many(indexed)
+    return email_data
+
+def get_history_changes(service, start_history_id: str) -> Tuple[List[str], Dict[str, List[str]], List[str]]:
+    """Changes to the email list since a Gmail history id.
+
+    Returns the ids of emails that joined the list (new or restored from trash
+    or spam), the current labels of listed emails whose labels changed, and
+    the ids of emails that left the list (deleted, trashed or spammed).
+    """
+    added: Dict[str, None] = {}
+    changed: Dict[str, List[str]] = {}
+    removed: Dict[str, None] = {}
+    new_ids = set()
+    page_token = None
+
+    while True:
+        response = execute(lambda: service.users().history().list(
+            userId="me",
+            startHistoryId=start_history_id,
+            historyTypes=["messageAdded", "messageDeleted", "labelAdded", "labelRemoved"],
+            pageToken=page_token
+        ), "history.list")
+
+        for record in response.get("history", []):
+            for item in record.get("messagesAdded", []):
+                message = item["message"]
+                new_ids.add(message["id"])
+                if not HIDDEN_LABELS & set(message.get("labelIds", [])):
+                    added[message["id"]] = None
+            for item in record.get("messagesDeleted", []):
+                email_id = item["message"]["id"]
+                added.pop(email_id, None)
+                changed.pop(email_id, None)
+                removed[email_id] = None
+            for item in record.get("labelsAdded", []) + record.get("labelsRemoved", []):
+                message = item["message"]
+                email_id = message["id"]
+                labels = message.get("labelIds", [])
+                if HIDDEN_LABELS & set(labels):
+                    # Trashed or spammed emails drop out of the list like deleted ones
+                    added.pop(email_id, None)
+                    changed.pop(email_id, None)
+                    removed[email_id] = None
+                elif email_id in removed or HIDDEN_LABELS & set(item.get("labelIds", [])):
+                    # Restored from trash or spam: the client no longer has it
+                    removed.pop(email_id, None)
+                    changed.pop(email_id, None)
+                    added[email_id] = None
+                elif email_id not in added:
+                    changed[email_id] = labels
+
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            break
+
+    # Emails that came and went since the token (draft autosaves, say) were never listed
+    return list(added), changed, [email_id for email_id in removed if email_id not in new_ids]
+
 @mcp.tool()
-def read_email(email_id: str) -> str:
-    """Read the content of an email."""
+@offload()
+def sync_emails(max_results: int = 10, query: Optional[str] = "", sync_token: Optional[str] = "") -> str:
+    """List emails for the email list UI, or only what changed since ``sync_token``.
+
+    The sync token is the mailbox's Gmail history id. When it is unchanged the
+    result has status 304. Otherwise, for the unfiltered list, only the emails
+    that joined the list and the new labels of changed emails are returned.
+    Filtered lists, expired tokens, large changes and any removal fall back to
+    the full list: a removal shrinks the client's window and the emails that
+    should refill it are not in the history.
+    """
 
     service = ensure_auth()
     try:
-        messages = service.users().messages().get(
+        profile = execute(lambda: service.users().getProfile(userId="me"), "users.getProfile")
+        history_id = str(profile["historyId"])
+
+        if sync_token and sync_token == history_id:
+            return json.dumps({"status": 304, "message": "No changes", "data": {"sync_token": history_id}})
+
+        if sync_token and not query:
+            try:
+                added, changed, removed = get_history_changes(service, sync_token)
+            except HttpError as error:
+                # 404 means the history id is too old; send the full list instead
+                if error.resp.status != 404:
+                    raise
+                added = None
+
+            if (added is not None and not removed and len(added) <= max_results
+                    and len(changed) <= MAX_DELTA_CHANGES):
+                return json.dumps({
+                    "status": 200,
+                    "message": "Email changes listed successfully",
+                    "data": {
+                        "sync_token": history_id,
+                        "full": False,
+                        "added": get_email_metadata(service, added),
+                        # Labels come from the history; the client ignores emails it does not list
+                        "changed": [{"id": email_id, "labels": labels} for email_id, labels in changed.items()]
+                    }
+                })
+
+        results = execute(lambda: service.users().messages().list(
+            userId="me",
+            maxResults=min(max_results, 100),
+            q=query
+        ), "messages.list")
+
+        email_data = get_email_metadata(service, [message["id"] for message in results.get("messages", [])])
+
+        return json.dumps({
+            "status": 200,
+            "message": "Emails listed successfully",
+            "data": {
+                "sync_token": history_id,
+                "full": True,
+                "count": len(email_data),
+                "messages": email_data
+            }
+        })
+
+    except HttpError as error:
+        return json.dumps({"status": 500, "message": f"An error occurred: {error}" ,"data": str(error)})
+
+    except Exception as error:
+        return json.dumps({"status": 500, "message": f"An error occurred: {error}" ,"data": str(error)})
+
+@mcp.tool()
+@offload()
+def read_email(
+    email_id: Annotated[str, Field(description="The Gmail message ID to read (obtained from list_emails)")]
+) -> str:
+    """Read the full content of a specific email by its ID.
+
+    ONLY use this when the user explicitly asks to read, open, or view a specific email.
+    DO NOT use for greetings or general questions.
+    You must have the email ID from list_emails first.
+    """
+
+    service = ensure_auth()
+    try:
+        messages = execute(lambda: service.users().messages().get(
             userId="me",
             id=email_id,
             format="full"
-        ).execute()
-
-        headers = {header["name"]: header["value"] for header in messages["payload"]["headers"]}
-
-        body = ""
-        if "parts" in messages["payload"]:
-            for part in messages["payload"]["parts"]:
-                if part["mimeType"] == "text/plain" and "data" in part["body"]:
-                    body = base64.urlsafe_b64decode(part["body"]["data"]).decode('utf-8')
-                    break
-        elif 'body' in messages["payload"] and "data" in messages["payload"]["body"]:
-            body = base64.urlsafe_b64decode(messages["payload"]["body"]["data"]).decode('utf-8')
+        ), "messages.get")
+
+        headers = get_headers(messages)
+        body_part = find_body(messages["payload"])
+        body_size = body_part.get("size", 0) if body_part else 0
+        body_handle = None
+
+        if body_part is None:
+            body = ""
+        elif "data" in body_part and body_size <= INLINE_BODY_LIMIT:
+            body = extract_body(messages["payload"])
+        else:
+            # Large bodies are spooled to a file and only a preview is sent
+            # through the MCP pipe; the API streams the rest by handle
+            if "data" in body_part:
+                data = body_part["data"]
+            else:
+                data = execute(lambda: service.users().messages().attachments().get(
+                    userId="me",
+                    messageId=email_id,
+                    id=body_part["attachmentId"]
+                ), "messages.attachments.get")["data"]
+
+            body_handle, body_size = write_spool(decode_chunks(data))
+            body = decode_prefix(data, INLINE_BODY_LIMIT)
+            # Don't hold the encoded body while the response is built
+            del data
+
+        email_index.add(email_id, f"{headers.get('Subject', '')}\n{headers.get('From', '')}\n{body}")
         
         return json.dumps({
             "status": 200,
             "message": "Email read successfully",
             "data": {
+                "id": email_id,
                 "from": headers.get("From", ""),
                 "subject": headers.get("Subject", ""),
                 "date": headers.get("Date", ""),
-                "body": body
+                "body": body,
+                "body_truncated": body_handle is not None,
+                "body_handle": body_handle,
+                "body_size": body_size,
+                "attachments": get_attachments(messages["payload"])
             }
         })
     
@@ -107,8 +337,162 @@ def read_email(email_id: str) -> str:
         return json.dumps({"status": 500, "message": f"An error occurred: {error}" ,"data": str(error)})
     
 @mcp.tool()
-def send_email(to: str, subject: str, body: str) -> str:
-    """Send an email."""
+@offload()
+def semantic_search(
+    query: Annotated[str, Field(description="Natural language description of the email to find")],
+    top_k: Annotated[int, Field(description="Number of matches to return (1-50). Default is 5.")] = 5
+) -> str:
+    """Find emails by topic or meaning using a local index of emails already fetched with list_emails or read_email.
+
+    Use this instead of guessing Gmail query strings when the user describes an email
+    (e.g. 'the email about the contract renewal').
+    Returns matching email IDs with similarity scores; use read_email to open them.
+    If nothing relevant is found, fall back to list_emails.
+    """
+
+    try:
+        matches = email_index.search(query, top_k=max(1, min(top_k, 50)))
+
+        return json.dumps({
+            "status": 200,
+            "message": f"Found {len(matches)} matching email(s) among {len(email_index)} indexed",
+            "data": {
+                "count": len(matches),
+                "matches": [{"id": email_id, "score": round(score, 4)} for email_id, score in matches]
+            }
+        })
+
+    except Exception as error:
+        return json.dumps({"status": 500, "message": f"An error occurred: {error}" ,"data": str(error)})
+
+@mcp.tool()
+@offload(concurrency=2)
+def summarize_threads(
+    query: Annotated[Optional[str], Field(description=(
+        "Gmail search query to choose threads (e.g. 'is:unread'). Empty string for the most recent threads."
+    ))] = "",
+    max_threads: Annotated[int, Field(description="Maximum number of threads to summarize (1-50). Default is 10.")] = 10
+) -> str:
+    """Summarize the user's recent email threads in one step.
+
+    ONLY use this when the user asks for a summary or overview of their emails or conversations.
+    Prefer this over calling read_email on many emails.
+    Supports Gmail search query syntax for filtering.
+    """
+
+    service = ensure_auth()
+    try:
+        results = execute(lambda: service.users().threads().list(
+            userId="me",
+            maxResults=min(max_threads, 50),
+            q=query
+        ), "threads.list")
+
+        threads = results.get("threads", [])
+
+        if not threads:
+            return json.dumps({"status": 200, "message": "No threads found", "data": {"count": 0, "threads": []}})
+
+        # Metadata is enough to check the cache; full bodies are only fetched
+        # for threads that changed since they were last summarized
+        thread_info = []
+        for thread in threads:
+            thread_data = execute(lambda: service.users().threads().get(
+                userId="me",
+                id=thread["id"],
+                format="metadata",
+                metadataHeaders=["Subject"]
+            ), "threads.get")
+            messages = thread_data.get("messages", [])
+            thread_info.append({
+                "id": thread["id"],
+                "subject": get_headers(messages[0]).get("Subject", "") if messages else "",
+                "latest_message_id": messages[-1]["id"] if messages else "",
+                "message_count": len(messages)
+            })
+
+        def load_thread(thread_id: str) -> str:
+            thread_data = execute(
+                lambda: service.users().threads().get(userId="me", id=thread_id, format="full"),
+                "threads.get"
+            )
+            parts = []
+            for message in thread_data.get("messages", []):
+                headers = get_headers(message)
+                parts.append(
+                    f"From: {headers.get('From', '')}\nDate: {headers.get('Date', '')}\n"
+                    f"Subject: {headers.get('Subject', '')}\n\n{extract_body(message['payload'])}"
+                )
+            return "\n\n---\n\n".join(parts)
+
+        summaries = thread_summarizer.summarize(
+            [(info["id"], info["latest_message_id"]) for info in thread_info],
+            load_thread
+        )
+
+        for info in thread_info:
+            info["summary"] = summaries.get(info["id"], "")
+
+        return json.dumps({
+            "status": 200,
+            "message": "Threads summarized successfully",
+            "data": {
+                "count": len(thread_info),
+                "threads": thread_info
+            }
+        })
+
+    except HttpError as error:
+        return json.dumps({"status": 500, "message": f"An error occurred: {error}" ,"data": str(error)})
+
+    except Exception as error:
+        return json.dumps({"status": 500, "message": f"An error occurred: {error}" ,"data": str(error)})
+
+@mcp.tool()
+@offload(concurrency=2)
+def fetch_attachment(
+    email_id: Annotated[str, Field(description="The Gmail message ID the attachment belongs to")],
+    attachment_id: Annotated[str, Field(description="The attachment ID (obtained from read_email)")]
+) -> str:
+    """Download an email attachment to a spool file and return its handle.
+
+    The attachment content is not returned; the API streams it from the handle.
+    """
+
+    service = ensure_auth()
+    try:
+        attachment = execute(lambda: service.users().messages().attachments().get(
+            userId="me",
+            messageId=email_id,
+            id=attachment_id
+        ), "messages.attachments.get")
+
+        handle, size = write_spool(decode_chunks(attachment.pop("data", "")))
+
+        return json.dumps({
+            "status": 200,
+            "message": "Attachment downloaded successfully",
+            "data": {"handle": handle, "size": size}
+        })
+
+    except HttpError as error:
+        return json.dumps({"status": 500, "message": f"An error occurred: {error}" ,"data": str(error)})
+
+    except Exception as error:
+        return json.dumps({"status": 500, "message": f"An error occurred: {error}" ,"data": str(error)})
+
+@mcp.tool()
+@offload(concurrency=2)
+def send_email(
+    to: Annotated[str, Field(description="Recipient email address (e.g., 'user@example.com')")],
+    subject: Annotated[str, Field(description="Email subject line")],
+    body: Annotated[str, Field(description="Email body content in plain text")]
+) -> str:
+    """Send an email via the user's Gmail account.
+
+    ONLY use this when the user explicitly asks to send, compose, or write an email.
+    DO NOT use for greetings or general questions.
+    """
 
     service = ensure_auth()
 
@@ -118,7 +502,11 @@ def send_email(to: str, subject: str, body: str) -> str:
         message["subject"] = subject
 
         create_message = {"raw": base64.urlsafe_b64encode(message.as_bytes()).decode()}
-        send_message = (service.users().messages().send(userId="me", body=create_message).execute())
+        send_message = execute(
+            lambda: service.users().messages().send(userId="me", body=create_message),
+            "messages.send",
+            idempotent=False
+        )
 
         return json.dumps({
             "status": 200,
@@ -132,5 +520,169 @@ def send_email(to: str, subject: str, body: str) -> str:
     except Exception as error:
         return json.dumps({"status": 500, "message": f"An error occurred: {error}" ,"data": str(error)})
     
+def resolve_email_ids(service, email_ids: Optional[List[str]], query: Optional[str]) -> Tuple[List[str], bool]:
+    """Combine explicit email ids with every email matching a search query.
+
+    Returns at most BULK_MODIFY_LIMIT ids, and whether more emails were selected.
+    """
+    ids = dict.fromkeys(email_ids or [])
+    more_pages = False
+
+    if query:
+        page_token = None
+        while len(ids) < BULK_MODIFY_LIMIT:
+            response = execute(lambda: service.users().messages().list(
+                userId="me",
+                q=query,
+                maxResults=500,
+                pageToken=page_token
+            ), "messages.list")
+
+            ids.update(dict.fromkeys(message["id"] for message in response.get("messages", [])))
+
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+        more_pages = page_token is not None
+
+    return list(ids)[:BULK_MODIFY_LIMIT], more_pages or len(ids) > BULK_MODIFY_LIMIT
+
+def resolve_label_ids(service, labels: Optional[List[str]]) -> List[str]:
+    """Map label names to Gmail label ids (system labels like UNREAD are their own id)"""
+    if not labels:
+        return []
+
+    user_labels = None
+    label_ids = []
+    for label in labels:
+        if label.upper() in SYSTEM_LABELS or label.upper().startswith("CATEGORY_"):
+            label_ids.append(label.upper())
+            continue
+
+        if user_labels is None:
+            response = execute(lambda: service.users().labels().list(userId="me"), "labels.list")
+            user_labels = {}
+            for user_label in response.get("labels", []):
+                user_labels[user_label["name"].lower()] = user_label["id"]
+                user_labels[user_label["id"].lower()] = user_label["id"]
+
+        if label.lower() not in user_labels:
+            raise ValueError(f"Label not found: {label}")
+        label_ids.append(user_labels[label.lower()])
+
+    return label_ids
+
+def modify_emails(email_ids: Optional[List[str]], query: Optional[str],
+                  add_labels: Optional[List[str]], remove_labels: Optional[List[str]], action: str) -> str:
+    """Apply label changes to the selected emails with batchModify, 1000 ids per call"""
+
+    service = ensure_auth()
+    try:
+        if not email_ids and not query:
+            return json.dumps({"status": 400, "message": "Provide email IDs or a search query", "data": None})
+
+        add_label_ids = resolve_label_ids(service, add_labels)
+        remove_label_ids = resolve_label_ids(service, remove_labels)
+        ids, truncated = resolve_email_ids(service, email_ids, query)
+
+        for start in range(0, len(ids), BATCH_MODIFY_SIZE):
+            chunk = ids[start:start + BATCH_MODIFY_SIZE]
+            execute(lambda: service.users().messages().batchModify(
+                userId="me",
+                body={
+                    "ids": chunk,
+                    "addLabelIds": add_label_ids,
+                    "removeLabelIds": remove_label_ids
+                }
+            ), "messages.batchModify", hedge=False)
+
+        # Trashed emails should no longer turn up in semantic search
+        if "TRASH" in add_label_ids:
+            for email_id in ids:
+                email_index.remove(email_id)
+
+        message = f"{len(ids)} email(s) {action}"
+        if truncated:
+            message += f"; stopped at the limit of {BULK_MODIFY_LIMIT}, more emails were selected and left unchanged"
+
+        return json.dumps({
+            "status": 200,
+            "message": message,
+            "data": {"count": len(ids), "truncated": truncated}
+        })
+
+    except ValueError as error:
+        return json.dumps({"status": 400, "message": str(error), "data": None})
+
+    except HttpError as error:
+        return json.dumps({"status": 500, "message": f"An error occurred: {error}" ,"data": str(error)})
+
+    except Exception as error:
+        return json.dumps({"status": 500, "message": f"An error occurred: {error}" ,"data": str(error)})
+
+EmailIds = Annotated[Optional[List[str]], Field(description="Gmail message IDs to change (obtained from list_emails)")]
+EmailQuery = Annotated[Optional[str], Field(description=(
+    "Gmail search query selecting the emails to change instead of (or in addition to) IDs, "
+    "e.g. 'from:newsletter@example.com older_than:30d'"
+))]
+
+@mcp.tool()
+@offload(concurrency=2)
+def mark_read(email_ids: EmailIds = None, query: EmailQuery = "") -> str:
+    """Mark emails as read.
+
+    ONLY use this when the user explicitly asks to mark emails as read.
+    Accepts email IDs or a Gmail search query; bulk changes are a single call.
+    """
+    return modify_emails(email_ids, query, [], ["UNREAD"], "marked as read")
+
+@mcp.tool()
+@offload(concurrency=2)
+def mark_unread(email_ids: EmailIds = None, query: EmailQuery = "") -> str:
+    """Mark emails as unread.
+
+    ONLY use this when the user explicitly asks to mark emails as unread.
+    Accepts email IDs or a Gmail search query; bulk changes are a single call.
+    """
+    return modify_emails(email_ids, query, ["UNREAD"], [], "marked as unread")
+
+@mcp.tool()
+@offload(concurrency=2)
+def archive_emails(email_ids: EmailIds = None, query: EmailQuery = "") -> str:
+    """Archive emails (remove them from the inbox without deleting them).
+
+    ONLY use this when the user explicitly asks to archive or clean up emails.
+    Accepts email IDs or a Gmail search query; bulk changes are a single call.
+    """
+    return modify_emails(email_ids, query, [], ["INBOX"], "archived")
+
+@mcp.tool()
+@offload(concurrency=2)
+def trash_emails(email_ids: EmailIds = None, query: EmailQuery = "") -> str:
+    """Move emails to the trash.
+
+    ONLY use this when the user explicitly asks to delete or trash emails.
+    Confirm with the user before trashing emails selected by a broad search query.
+    """
+    return modify_emails(email_ids, query, ["TRASH"], ["INBOX"], "moved to trash")
+
+@mcp.tool()
+@offload(concurrency=2)
+def modify_labels(
+    email_ids: EmailIds = None,
+    query: EmailQuery = "",
+    add_labels: Annotated[Optional[List[str]], Field(description="Label names to add, e.g. ['Work', 'STARRED']")] = None,
+    remove_labels: Annotated[Optional[List[str]], Field(description="Label names to remove, e.g. ['IMPORTANT']")] = None
+) -> str:
+    """Add or remove labels on emails.
+
+    ONLY use this when the user explicitly asks to label, unlabel, star or unstar emails.
+    Accepts email IDs or a Gmail search query; bulk changes are a single call.
+    """
+    if not add_labels and not remove_labels:
+        return json.dumps({"status": 400, "message": "Provide labels to add or remove", "data": None})
+
+    return modify_emails(email_ids, query, add_labels, remove_labels, "relabeled")
+
 if __name__ == "__main__":
     mcp.run()
\ No newline at end of file
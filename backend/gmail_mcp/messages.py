@@ -0,0 +1,50 @@
+import base64
+from typing import Any, Dict, Iterator, List, Optional
+
+
+def get_headers(message: Dict[str, Any]) -> Dict[str, str]:
+    """Map header names to values for a Gmail message resource"""
+    return {header["name"]: header["value"] for header in message["payload"].get("headers", [])}
+
+
+def find_body(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return the body of the plain text part of a Gmail message payload.
+
+    The body has either inline ``data`` or, for large parts, an ``attachmentId``.
+    """
+    if "parts" in payload:
+        for part in payload["parts"]:
+            if part["mimeType"] == "text/plain" and ("data" in part["body"] or "attachmentId" in part["body"]):
+                return part["body"]
+    elif 'body' in payload and ("data" in payload["body"] or "attachmentId" in payload["body"]):
+        return payload["body"]
+    return None
+
+
+def extract_body(payload: Dict[str, Any]) -> str:
+    """Return the plain text body of a Gmail message payload"""
+    body = find_body(payload)
+    if body is None or "data" not in body:
+        return ""
+    return base64.urlsafe_b64decode(body["data"]).decode('utf-8')
+
+
+def iter_parts(payload: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Yield every MIME part of a payload, depth first"""
+    yield payload
+    for part in payload.get("parts", []):
+        yield from iter_parts(part)
+
+
+def get_attachments(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Metadata of the attachments of a Gmail message payload"""
+    return [
+        {
+            "attachment_id": part["body"]["attachmentId"],
+            "filename": part["filename"],
+            "mime_type": part.get("mimeType", "application/octet-stream"),
+            "size": part["body"].get("size", 0)
+        }
+        for part in iter_parts(payload)
+        if part.get("filename") and "attachmentId" in part.get("body", {})
+    ]
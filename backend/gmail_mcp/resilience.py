@@ -0,0 +1,257 @@
+import os
+import sys
+import json
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Optional, Set
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RETRY_ATTEMPTS = int(os.getenv('RETRY_ATTEMPTS', '3'))
+RETRY_BASE_DELAY = float(os.getenv('RETRY_BASE_DELAY', '0.5'))
+RETRY_MAX_DELAY = float(os.getenv('RETRY_MAX_DELAY', '8'))
+
+# Consecutive transient failures that open an endpoint's circuit, and how
+# long it stays open before one trial call is let through.
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_RESET_TIMEOUT = float(os.getenv('BREAKER_RESET_TIMEOUT', '30'))
+
+# When set (e.g. 95), a hedged read sends a second identical request once the
+# first has taken longer than that latency percentile for its endpoint.
+HEDGE_PERCENTILE = float(os.getenv('HEDGE_PERCENTILE', '0'))
+HEDGE_MIN_SAMPLES = 20
+# Threads for hedged requests; a call that finds none free runs unhedged
+# instead of queueing behind other calls
+HEDGE_MAX_WORKERS = int(os.getenv('HEDGE_MAX_WORKERS', '32'))
+
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+# Gmail reports most rate limiting as 403 with one of these reasons
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose circuit is open"""
+
+
+def status_code(error: Exception) -> Optional[int]:
+    """HTTP status of a googleapiclient HttpError or google.api_core exception"""
+    resp = getattr(error, 'resp', None)
+    if resp is not None and getattr(resp, 'status', None):
+        return int(resp.status)
+
+    code = getattr(error, 'code', None)
+    if isinstance(code, int):
+        return code
+
+    return None
+
+
+def error_reasons(error: Exception) -> Set[str]:
+    """Error reasons ("rateLimitExceeded", ...) from a googleapiclient HttpError's body"""
+    try:
+        details = json.loads(getattr(error, 'content', None) or b'{}').get('error', {})
+        return {item.get('reason') for item in details.get('errors', []) if isinstance(item, dict)}
+    except (ValueError, AttributeError):
+        return set()
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Whether the request was rejected by rate limiting, before it was processed"""
+    status = status_code(error)
+    return status == 429 or (status == 403 and bool(error_reasons(error) & RATE_LIMIT_REASONS))
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether an error is worth retrying (rate limits, server errors, network failures)"""
+    import requests
+    from urllib3.exceptions import ProtocolError, TimeoutError as Urllib3TimeoutError
+
+    network_errors = (
+        ConnectionError, TimeoutError,
+        requests.ConnectionError, requests.Timeout,
+        # The pooled Gmail transport; new connections failing are urllib3 timeouts too
+        ProtocolError, Urllib3TimeoutError
+    )
+    if isinstance(error, network_errors):
+        return True
+    return status_code(error) in TRANSIENT_STATUS_CODES or is_rate_limited(error)
+
+
+class CircuitBreaker:
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def before_call(self):
+        with self.lock:
+            if self.state == 'closed':
+                return
+
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if self.state == 'open' and remaining <= 0:
+                # Let a single trial call through
+                self.state = 'half_open'
+                return
+
+            raise CircuitOpenError(
+                f"{self.name} is temporarily unavailable after repeated errors, retry in {max(remaining, 0):.0f}s"
+            )
+
+    def record_success(self):
+        with self.lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Sliding window of recent successful call latencies"""
+
+    def __init__(self, size: int = 200):
+        self.samples = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        with self.lock:
+            if len(self.samples) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class Endpoint:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(name)
+        self.latencies = LatencyTracker()
+
+
+_endpoints: Dict[str, Endpoint] = {}
+_endpoints_lock = threading.Lock()
+_hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix='hedge')
+_hedge_slots = threading.BoundedSemaphore(HEDGE_MAX_WORKERS)
+
+
+def get_endpoint(name: str) -> Endpoint:
+    with _endpoints_lock:
+        if name not in _endpoints:
+            _endpoints[name] = Endpoint(name)
+        return _endpoints[name]
+
+
+def call(fn: Callable[[], Any], endpoint: str, idempotent: bool = True, hedge: bool = False) -> Any:
+    """Call ``fn`` with retries, a per-endpoint circuit breaker and optional hedging.
+
+    Transient errors are retried with full-jitter exponential backoff.
+    Non-idempotent calls are only retried when rate limited, where the
+    request was rejected before it was processed. ``hedge`` is only honoured
+    for idempotent calls, and ``fn`` must then be safe to run twice concurrently.
+    """
+    ep = get_endpoint(endpoint)
+
+    for attempt in range(RETRY_ATTEMPTS):
+        ep.breaker.before_call()
+        start = time.monotonic()
+
+        try:
+            if hedge and idempotent and HEDGE_PERCENTILE:
+                result = _hedged_call(fn, ep)
+            else:
+                result = fn()
+                ep.latencies.record(time.monotonic() - start)
+
+        except Exception as error:
+            if not is_transient(error):
+                # The endpoint answered, it just rejected this request
+                ep.breaker.record_success()
+                raise
+
+            ep.breaker.record_failure()
+
+            retryable = idempotent or is_rate_limited(error)
+            if not retryable or attempt == RETRY_ATTEMPTS - 1:
+                raise
+
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+            # stderr: in the MCP server, stdout is the JSON-RPC channel
+            print(f"Transient error from {endpoint}: {error}. Retrying in {delay:.2f}s", file=sys.stderr)
+            time.sleep(delay)
+            continue
+
+        ep.breaker.record_success()
+        return result
+
+
+def _submit_hedge(fn: Callable[[], Any]) -> Optional[Future]:
+    """Start ``fn`` on a free hedge thread, or return None if every thread is busy"""
+    if not _hedge_slots.acquire(blocking=False):
+        return None
+
+    def run():
+        try:
+            return fn()
+        finally:
+            _hedge_slots.release()
+
+    return _hedge_executor.submit(run)
+
+
+def _hedged_call(fn: Callable[[], Any], ep: Endpoint) -> Any:
+    start = time.monotonic()
+    threshold = ep.latencies.percentile(HEDGE_PERCENTILE)
+    primary = _submit_hedge(fn) if threshold is not None else None
+
+    if primary is None:
+        result = fn()
+        ep.latencies.record(time.monotonic() - start)
+        return result
+
+    # Record how long the primary request itself took, even when a backup
+    # answers first; recording the hedged latency would drag the percentile
+    # down and make hedging ever more frequent
+    def record_latency(future: Future):
+        if not future.cancelled() and future.exception() is None:
+            ep.latencies.record(time.monotonic() - start)
+
+    primary.add_done_callback(record_latency)
+
+    done, _ = wait([primary], timeout=threshold)
+    if done:
+        return primary.result()
+
+    backup = _submit_hedge(fn)
+    if backup is None:
+        return primary.result()
+
+    done, _ = wait([primary, backup], return_when=FIRST_COMPLETED)
+    first = done.pop()
+    other = backup if first is primary else primary
+    if first.exception() is None:
+        # Only drops the loser if it hasn't started; a request in flight can't be interrupted
+        other.cancel()
+        return first.result()
+
+    # The first to finish failed: fall back to the other one
+    return other.result()
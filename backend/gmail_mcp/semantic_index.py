@@ -0,0 +1,140 @@
+import os
+import re
+import zlib
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Tuple
+import numpy as np
+
+EMBEDDING_DIM = int(os.getenv('GMAIL_INDEX_DIM', '512'))
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+@lru_cache(maxsize=100_000)
+def _word_features(word: str, dim: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed bucket indices and signs for a word and its character trigrams"""
+    padded = f"#{word}#"
+    features = [word] + [padded[i:i + 3] for i in range(len(padded) - 2)]
+    hashes = np.array([zlib.crc32(feature.encode('utf-8')) for feature in features], dtype=np.uint32)
+
+    indices = (hashes % dim).astype(np.intp)
+    signs = np.where(hashes & 0x80000000, 1.0, -1.0)
+    return indices, signs
+
+
+def embed(text: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """Embed text with signed feature hashing of words and character trigrams.
+
+    This needs no model download and runs on CPU, and still matches
+    morphological variants ("renewal" / "renew") through shared trigrams.
+    crc32 is used instead of ``hash()`` so vectors are stable across
+    processes, and per-word features are memoized since mail vocabulary
+    repeats heavily.
+    """
+    counts = Counter(_WORD_RE.findall(text.lower()))
+    if not counts:
+        return np.zeros(dim, dtype=np.float32)
+
+    indices = []
+    weights = []
+    for word, count in counts.items():
+        word_indices, signs = _word_features(word, dim)
+        indices.append(word_indices)
+        weights.append(signs * count)
+
+    vector = np.bincount(
+        np.concatenate(indices),
+        weights=np.concatenate(weights),
+        minlength=dim
+    ).astype(np.float32)
+
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+class SemanticIndex:
+    """In-memory cosine-similarity index over email text.
+
+    Rows live in one preallocated float32 matrix that doubles in size when
+    full, so adding messages is amortized O(1) and a query is a single
+    matrix-vector product. Re-adding an id replaces its vector, which lets
+    the index grow from list metadata to full bodies as emails are read.
+    """
+
+    def __init__(self, dim: int = EMBEDDING_DIM, capacity: int = 1024):
+        self.dim = dim
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, email_id: str, text: str):
+        self.add_many([(email_id, text)])
+
+    def add_many(self, items: List[Tuple[str, str]]):
+        embedded = [(email_id, embed(text, self.dim)) for email_id, text in items]
+
+        with self.lock:
+            for email_id, vector in embedded:
+                row = self.rows.get(email_id)
+                if row is None:
+                    row = len(self.ids)
+                    if row == len(self.vectors):
+                        self._grow()
+                    self.ids.append(email_id)
+                    self.rows[email_id] = row
+                self.vectors[row] = vector
+
+    def remove(self, email_id: str):
+        with self.lock:
+            row = self.rows.pop(email_id, None)
+            if row is None:
+                return
+
+            # Move the last row into the hole to keep the matrix dense
+            last = len(self.ids) - 1
+            if row != last:
+                moved_id = self.ids[last]
+                self.vectors[row] = self.vectors[last]
+                self.ids[row] = moved_id
+                self.rows[moved_id] = row
+            self.ids.pop()
+
+    def clear(self):
+        with self.lock:
+            self.vectors[:] = 0
+            self.ids = []
+            self.rows = {}
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """Best matches for ``query``, leaving out emails with nothing in common with it"""
+        query_vector = embed(query, self.dim)
+        if not query_vector.any():
+            return []
+
+        with self.lock:
+            count = len(self.ids)
+            if count == 0:
+                return []
+
+            scores = self.vectors[:count] @ query_vector
+            top_k = min(top_k, count)
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            top = top[np.argsort(-scores[top])]
+
+            return [(self.ids[row], float(scores[row])) for row in top if scores[row] > 0]
+
+    def _grow(self):
+        grown = np.zeros((len(self.vectors) * 2, self.dim), dtype=np.float32)
+        grown[:len(self.vectors)] = self.vectors
+        self.vectors = grown
+
+
+email_index = SemanticIndex()
@@ -0,0 +1,116 @@
+import os
+import re
+import stat
+import time
+import uuid
+import base64
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Tuple
+
+# Message bodies larger than this (in bytes) are written to a spool file and
+# referenced by handle instead of being sent inline through the MCP pipe.
+INLINE_BODY_LIMIT = int(os.getenv('GMAIL_INLINE_BODY_LIMIT', str(256 * 1024)))
+# The spool directory is shared by the MCP server and the API, which streams
+# spooled files to the browser. Only its owner may read it.
+SPOOL_DIR = Path(os.getenv('GMAIL_SPOOL_DIR', str(Path.home() / '.gmail_mcp_spool')))
+SPOOL_TTL = float(os.getenv('GMAIL_SPOOL_TTL', '3600'))
+
+# Base64 characters decoded at a time; a multiple of 4 so every chunk decodes on its own
+DECODE_CHUNK_SIZE = 64 * 1024
+CLEANUP_INTERVAL = 60
+
+_HANDLE_PATTERN = re.compile(r'[0-9a-f]{32}')
+_SPOOL_FILE_PATTERN = re.compile(r'[0-9a-f]{32}(\.tmp)?')
+_last_cleanup = 0.0
+_cleanup_lock = threading.Lock()
+
+
+def decode_chunks(data: str) -> Iterator[bytes]:
+    """Decode Gmail's URL-safe base64 a chunk at a time"""
+    for start in range(0, len(data), DECODE_CHUNK_SIZE):
+        chunk = data[start:start + DECODE_CHUNK_SIZE]
+        yield base64.urlsafe_b64decode(chunk + '=' * (-len(chunk) % 4))
+
+
+def decode_prefix(data: str, limit: int) -> str:
+    """Decode about the first ``limit`` bytes of URL-safe base64 text"""
+    chunk = data[:(limit + 2) // 3 * 4]
+    decoded = base64.urlsafe_b64decode(chunk + '=' * (-len(chunk) % 4))
+    # The cut may fall inside a multi-byte character
+    return decoded[:limit].decode('utf-8', errors='ignore')
+
+
+def ensure_spool_dir():
+    """Create the spool directory private to this user, refusing one owned by someone else"""
+    SPOOL_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    if hasattr(os, 'getuid'):
+        # Check the path itself too, so a symlink planted by another user is refused
+        for info in (SPOOL_DIR.lstat(), SPOOL_DIR.stat()):
+            if info.st_uid != os.getuid():
+                raise PermissionError(f"Spool directory {SPOOL_DIR} is owned by another user")
+    if stat.S_IMODE(SPOOL_DIR.stat().st_mode) & 0o077:
+        SPOOL_DIR.chmod(0o700)
+
+
+def write_spool(chunks: Iterable[bytes]) -> Tuple[str, int]:
+    """Write chunks to a new spool file and return its handle and size"""
+    cleanup_spool()
+    ensure_spool_dir()
+
+    handle = uuid.uuid4().hex
+    path = SPOOL_DIR / handle
+    tmp_path = path.with_suffix('.tmp')
+    size = 0
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return handle, size
+
+
+def spool_path(handle: str) -> Optional[Path]:
+    """Path of a spooled file, or None if the handle is invalid or expired"""
+    if not _HANDLE_PATTERN.fullmatch(handle):
+        return None
+    path = SPOOL_DIR / handle
+    return path if path.exists() else None
+
+
+def spool_files() -> Iterator[Path]:
+    """Files in the spool directory written by write_spool; anything else is left alone"""
+    return (path for path in SPOOL_DIR.iterdir() if _SPOOL_FILE_PATTERN.fullmatch(path.name))
+
+
+def cleanup_spool():
+    """Delete spool files older than SPOOL_TTL, at most once a minute"""
+    global _last_cleanup
+
+    with _cleanup_lock:
+        now = time.time()
+        if now - _last_cleanup < CLEANUP_INTERVAL or not SPOOL_DIR.exists():
+            return
+        _last_cleanup = now
+
+    for path in spool_files():
+        try:
+            if path.stat().st_mtime < now - SPOOL_TTL:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def clear_spool():
+    """Delete every spooled file (on logout)"""
+    if not SPOOL_DIR.exists():
+        return
+    for path in spool_files():
+        path.unlink(missing_ok=True)
@@ -0,0 +1,208 @@
+import os
+import sys
+import json
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from . import resilience
+
+SUMMARY_CACHE_PATH = Path.home() / '.gmail_mcp_summaries.json'
+SUMMARY_MODEL = os.getenv('SUMMARY_MODEL', 'gemini-2.5-flash')
+# Approximate prompt tokens per model request, and the most any one thread
+# may contribute before its oldest text is dropped.
+SUMMARY_TOKEN_BUDGET = int(os.getenv('SUMMARY_TOKEN_BUDGET', '8000'))
+SUMMARY_THREAD_TOKEN_LIMIT = int(os.getenv('SUMMARY_THREAD_TOKEN_LIMIT', '2000'))
+# Summaries kept in the cache file; the least recently used are dropped first
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv('SUMMARY_CACHE_MAX_ENTRIES', '2000'))
+
+PROMPT_HEADER = (
+    "Summarize each of the following email threads in 1-3 sentences, "
+    "focusing on decisions, requests and deadlines. "
+    "Respond with only a JSON object mapping each thread ID to its summary.\n\n"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+class SummaryCache:
+    """Thread summaries keyed by thread id, valid while its latest message is unchanged"""
+
+    def __init__(self, path: Optional[Path] = SUMMARY_CACHE_PATH, max_entries: int = SUMMARY_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries: Dict[str, Dict[str, str]] = {}
+        self.lock = threading.Lock()
+
+        if path and path.exists():
+            try:
+                with open(path, 'r') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f'Error loading summary cache: {e}', file=sys.stderr)
+
+    def get(self, thread_id: str, latest_message_id: str) -> Optional[str]:
+        with self.lock:
+            entry = self.entries.get(thread_id)
+            if entry and entry["latest_message_id"] == latest_message_id:
+                # Entries are kept in least recently used order
+                self.entries[thread_id] = self.entries.pop(thread_id)
+                return entry["summary"]
+        return None
+
+    def put(self, thread_id: str, latest_message_id: str, summary: str):
+        with self.lock:
+            self.entries.pop(thread_id, None)
+            self.entries[thread_id] = {"latest_message_id": latest_message_id, "summary": summary}
+            while len(self.entries) > self.max_entries:
+                del self.entries[next(iter(self.entries))]
+
+    def save(self):
+        if not self.path:
+            return
+        # Concurrent summarize_threads calls save at the same time: each
+        # writes its own temp file, and the lock keeps the newest write last
+        with self.lock:
+            with tempfile.NamedTemporaryFile('w', dir=self.path.parent, prefix=self.path.name,
+                                             suffix='.tmp', delete=False) as f:
+                json.dump(self.entries, f)
+            os.replace(f.name, self.path)
+
+
+class ThreadSummarizer:
+    """Summarizes threads in as few model requests as possible.
+
+    Threads whose latest message id matches the cache are never sent to the
+    model. The rest are packed, largest first, into prompts of at most
+    ``token_budget`` tokens, and each prompt asks for a JSON object of
+    summaries for all threads it contains.
+    """
+
+    def __init__(self, generate: Callable[[str], str], cache: Optional[SummaryCache] = None,
+                 token_budget: int = SUMMARY_TOKEN_BUDGET,
+                 thread_token_limit: int = SUMMARY_THREAD_TOKEN_LIMIT):
+        self.generate = generate
+        self.cache = cache if cache is not None else SummaryCache()
+        self.token_budget = token_budget
+        self.thread_token_limit = thread_token_limit
+
+    def summarize(self, threads: List[Tuple[str, str]], load_thread: Callable[[str], str]) -> Dict[str, str]:
+        """Summarize ``(thread_id, latest_message_id)`` pairs.
+
+        ``load_thread`` returns the text of a thread and is only called for
+        threads missing from the cache.
+        """
+        summaries = {}
+        missing = []
+        for thread_id, latest_message_id in threads:
+            cached = self.cache.get(thread_id, latest_message_id)
+            if cached is not None:
+                summaries[thread_id] = cached
+            else:
+                missing.append((thread_id, latest_message_id))
+
+        if not missing:
+            return summaries
+
+        documents = [
+            (thread_id, latest_message_id, self._truncate(load_thread(thread_id)))
+            for thread_id, latest_message_id in missing
+        ]
+
+        for batch in self._pack(documents):
+            for thread_id, summary in self._summarize_batch(batch).items():
+                summaries[thread_id] = summary
+
+        for thread_id, latest_message_id, _ in documents:
+            if thread_id in summaries:
+                self.cache.put(thread_id, latest_message_id, summaries[thread_id])
+        self.cache.save()
+
+        return summaries
+
+    def _truncate(self, text: str) -> str:
+        # Keep the end of the thread: the latest messages matter most
+        limit = self.thread_token_limit * 4
+        if len(text) <= limit:
+            return text
+        return "..." + text[-limit:]
+
+    def _pack(self, documents: List[Tuple[str, str, str]]) -> List[List[Tuple[str, str, str]]]:
+        """First-fit decreasing bin packing of threads into token-budgeted batches"""
+        budget = self.token_budget - estimate_tokens(PROMPT_HEADER)
+        batches: List[List[Tuple[str, str, str]]] = []
+        remaining: List[int] = []
+
+        for document in sorted(documents, key=lambda d: len(d[2]), reverse=True):
+            cost = estimate_tokens(self._format(document))
+            for i, space in enumerate(remaining):
+                if cost <= space:
+                    batches[i].append(document)
+                    remaining[i] -= cost
+                    break
+            else:
+                batches.append([document])
+                remaining.append(budget - cost)
+
+        return batches
+
+    @staticmethod
+    def _format(document: Tuple[str, str, str]) -> str:
+        thread_id, _, text = document
+        return f"### THREAD {thread_id}\n{text}\n\n"
+
+    def _summarize_batch(self, batch: List[Tuple[str, str, str]]) -> Dict[str, str]:
+        prompt = PROMPT_HEADER + "".join(self._format(document) for document in batch)
+        response = self.generate(prompt)
+
+        try:
+            parsed = json.loads(response.strip().removeprefix("```json").strip("`\n "))
+            if isinstance(parsed, dict):
+                return {
+                    document[0]: str(parsed[document[0]])
+                    for document in batch if document[0] in parsed
+                }
+        except ValueError:
+            pass
+
+        # The model didn't return usable JSON: retry in smaller batches, and
+        # for a single thread take the reply itself as the summary
+        if len(batch) == 1:
+            return {batch[0][0]: response.strip()}
+
+        middle = len(batch) // 2
+        summaries = self._summarize_batch(batch[:middle])
+        summaries.update(self._summarize_batch(batch[middle:]))
+        return summaries
+
+
+_gemini_model = None
+
+
+def gemini_generate(prompt: str) -> str:
+    """Generate text with Gemini, creating the model on first use"""
+    global _gemini_model
+
+    if _gemini_model is None:
+        import google.generativeai as genai
+
+        api_key = os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found. ")
+
+        genai.configure(api_key=api_key)
+        _gemini_model = genai.GenerativeModel(
+            model_name=SUMMARY_MODEL,
+            generation_config={"response_mime_type": "application/json"}
+        )
+
+    return resilience.call(
+        lambda: _gemini_model.generate_content(prompt).text,
+        endpoint="gemini.generate_content"
+    )
+
+
+thread_summarizer = ThreadSummarizer(gemini_generate)
@@ -0,0 +1,103 @@
+import os
+import threading
+from typing import Optional
+import httplib2
+import google_auth_httplib2
+import certifi
+import urllib3
+from google.auth.transport.urllib3 import AuthorizedHttp
+from .concurrency import MAX_WORKERS
+from .resilience import HEDGE_MAX_WORKERS
+
+# "pooled" (default) shares one keep-alive connection pool across threads,
+# "httplib2" restores googleapiclient's default one-connection transport.
+HTTP_TRANSPORT = os.getenv('GMAIL_HTTP_TRANSPORT', 'pooled')
+# Every tool worker and hedge thread may hold a connection at once; beyond
+# the pool size requests open throwaway connections with their own handshake
+HTTP_POOL_SIZE = int(os.getenv('GMAIL_HTTP_POOL_SIZE', str(MAX_WORKERS + HEDGE_MAX_WORKERS)))
+HTTP_TIMEOUT = float(os.getenv('GMAIL_HTTP_TIMEOUT', '30'))
+
+
+class PooledHttp:
+    """httplib2.Http-compatible transport backed by a urllib3 connection pool.
+
+    googleapiclient only calls ``request()`` on its transport, so this adapter
+    can be passed as ``build(..., http=...)``. The pool is thread-safe and
+    keeps connections alive, so one instance can serve concurrent Gmail calls
+    without a TLS handshake per request. google-auth's urllib3 wrapper adds
+    the credentials and refreshes them on a 401, like AuthorizedSession, but
+    without the per-request overhead of a requests session.
+    """
+
+    def __init__(self, credentials, pool_size: int = HTTP_POOL_SIZE, timeout: float = HTTP_TIMEOUT,
+                 ca_certs: Optional[str] = None):
+        self.credentials = credentials
+
+        pool = urllib3.PoolManager(
+            maxsize=pool_size,
+            timeout=timeout,
+            # googleapiclient retries on its own
+            retries=False,
+            cert_reqs='CERT_REQUIRED',
+            ca_certs=ca_certs or certifi.where()
+        )
+        self.http = AuthorizedHttp(credentials, http=pool)
+
+    def request(self, uri, method='GET', body=None, headers=None,
+                redirections=httplib2.DEFAULT_MAX_REDIRECTS, connection_type=None):
+        response = self.http.urlopen(
+            method,
+            uri,
+            body=body,
+            headers=headers or {},
+            redirect=redirections > 0
+        )
+
+        info = {key.lower(): value for key, value in response.headers.items()}
+        info['status'] = str(response.status)
+        resp = httplib2.Response(info)
+        resp.reason = response.reason
+
+        return resp, response.data
+
+    def close(self):
+        self.http.http.clear()
+
+
+_shared_http: Optional[PooledHttp] = None
+_shared_lock = threading.Lock()
+
+
+def build_http(credentials):
+    """Return the transport to pass to googleapiclient's ``build``.
+
+    The pooled transport is shared by every caller using the same credentials;
+    the httplib2 transport is not thread-safe, so each call gets its own.
+    """
+    global _shared_http
+
+    if HTTP_TRANSPORT == 'httplib2':
+        return google_auth_httplib2.AuthorizedHttp(
+            credentials,
+            http=httplib2.Http(timeout=HTTP_TIMEOUT)
+        )
+
+    if HTTP_TRANSPORT != 'pooled':
+        raise ValueError(f"Unknown GMAIL_HTTP_TRANSPORT: {HTTP_TRANSPORT}")
+
+    with _shared_lock:
+        if _shared_http is None or _shared_http.credentials is not credentials:
+            if _shared_http:
+                _shared_http.close()
+            _shared_http = PooledHttp(credentials)
+        return _shared_http
+
+
+def close_http():
+    """Close the shared pooled transport, if any."""
+    global _shared_http
+
+    with _shared_lock:
+        if _shared_http:
+            _shared_http.close()
+            _shared_http = None
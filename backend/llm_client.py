@@ -1,11 +1,124 @@
 import os
-from typing import List, Dict, Any
+import time
+import asyncio
+import inspect
+import importlib.util
+from typing import List, Dict, Any, Optional
 from gmail_client import gmail_client
+from gmail_mcp import resilience
+from state import state_backend
+import tracing
 from dotenv import load_dotenv
-import google.generativeai as genai
 
 load_dotenv()
 
+CHAT_SESSION_TTL = int(os.getenv('CHAT_SESSION_TTL', str(24 * 60 * 60)))
+
+SYSTEM_INSTRUCTION = (
+    "You are a helpful Gmail assistant. "
+    "IMPORTANT: Do NOT call any functions unless the user explicitly requests an email-related action. "
+    "\n\nCall functions ONLY for these requests:"
+    "\n- Listing/showing/checking emails (use list_emails)"
+    "\n- Reading/opening a specific email (use read_email)"
+    "\n- Finding an email by topic or meaning, e.g. 'the email about the contract renewal' (use semantic_search, then read_email)"
+    "\n- Summarizing the inbox or recent conversations (use summarize_threads instead of reading emails one by one)"
+    "\n- Sending/composing an email (use send_email)"
+    "\n- Marking emails read/unread, archiving, trashing or labeling them (use mark_read, mark_unread, archive_emails, trash_emails or modify_labels; "
+    "pass a Gmail search query to change many emails in one call)"
+    "\n- Checking authentication status (use get_auth_status)"
+    "\n\nDo NOT call functions for:"
+    "\n- Greetings (hi, hello, how are you, etc.)"
+    "\n- General questions or conversation"
+    "\n- Asking about capabilities"
+    "\n- Any non-email-specific requests"
+    "\n\nRespond naturally and conversationally without using tools for casual interactions."
+)
+
+# google.generativeai is slow to import, so it is loaded on the first chat
+# instead of when the API process (or a --reload worker) starts.
+genai = None
+
+# Tool declarations are generated once from the MCP server's tools/list, so
+# the server's tool definitions are the single source of truth.
+# Tools that only serve the REST API are not offered to the model.
+UI_ONLY_TOOLS = {"sync_emails", "fetch_attachment"}
+_tool_schemas: Optional[Dict[str, Dict[str, Any]]] = None
+_function_declarations: Optional[List[Any]] = None
+
+
+def _load_genai():
+    global genai
+
+    if genai is None:
+        import google.generativeai
+        genai = google.generativeai
+    return genai
+
+
+def _to_schema(schema: Dict[str, Any]):
+    """Convert a JSON Schema from tools/list to a Gemini Schema"""
+    # Optional[...] parameters are emitted as anyOf [<type>, null]
+    options = [option for option in schema.get("anyOf", []) if option.get("type") != "null"]
+    if options:
+        schema = {**options[0], **{key: value for key, value in schema.items() if key != "anyOf"}}
+
+    json_type = schema.get("type", "string")
+    kwargs = {"type": genai.protos.Type[json_type.upper()]}
+
+    if schema.get("description"):
+        kwargs["description"] = schema["description"]
+    if schema.get("enum"):
+        kwargs["enum"] = [str(value) for value in schema["enum"]]
+
+    if json_type == "object":
+        kwargs["properties"] = {
+            name: _to_schema(property_schema)
+            for name, property_schema in schema.get("properties", {}).items()
+        }
+        if schema.get("required"):
+            kwargs["required"] = schema["required"]
+    elif json_type == "array":
+        kwargs["items"] = _to_schema(schema.get("items", {"type": "string"}))
+
+    return genai.protos.Schema(**kwargs)
+
+
+def _to_python(value: Any) -> Any:
+    """Convert Gemini's proto map/list wrappers in function call args to plain Python"""
+    if hasattr(value, "items"):
+        return {key: _to_python(item) for key, item in value.items()}
+    if isinstance(value, (str, bytes)):
+        return value
+    if hasattr(value, "__iter__"):
+        return [_to_python(item) for item in value]
+    return value
+
+
+def _coerce_args(function_name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+    """Cast numbers to int where the tool's schema expects an integer (Gemini sends floats)"""
+    properties = (_tool_schemas or {}).get(function_name, {}).get("properties", {})
+
+    for key, value in args.items():
+        property_schema = properties.get(key, {})
+        types = [property_schema.get("type")] + [option.get("type") for option in property_schema.get("anyOf", [])]
+        if "integer" in types and isinstance(value, float):
+            args[key] = int(value)
+
+    return args
+
+
+def _response_parts(response) -> List[Dict[str, Any]]:
+    """Plain-dict copy of a Gemini response's parts for traces"""
+    parts = []
+    for part in response.parts:
+        function_call = getattr(part, 'function_call', None)
+        if function_call and function_call.name:
+            parts.append({"function_call": {"name": function_call.name, "args": _to_python(function_call.args or {})}})
+        elif getattr(part, 'text', None):
+            parts.append({"text": part.text})
+    return parts
+
+
 class GeminiLLMClient:
 
     def __init__(self, model: str = "gemini-2.5-flash"):
@@ -15,34 +128,20 @@ class GeminiLLMClient:
             api_key = os.getenv('GEMINI_API_KEY')
             if not api_key:
                 raise ValueError("GEMINI_API_KEY not found. ")
-            
-            genai.configure(api_key=api_key)
 
-            self.model_name = model
+            if importlib.util.find_spec("google.generativeai") is None:
+                raise ImportError()
 
-            self.model = genai.GenerativeModel(
-                model_name=model,
-                tools=self._get_function_declarations(),
-                system_instruction=(
-                    "You are a helpful Gmail assistant. "
-                    "IMPORTANT: Do NOT call any functions unless the user explicitly requests an email-related action. "
-                    "\n\nCall functions ONLY for these requests:"
-                    "\n- Listing/showing/checking emails (use list_emails)"
-                    "\n- Reading/opening a specific email (use read_email)"
-                    "\n- Sending/composing an email (use send_email)"
-                    "\n- Checking authentication status (use get_auth_status)"
-                    "\n\nDo NOT call functions for:"
-                    "\n- Greetings (hi, hello, how are you, etc.)"
-                    "\n- General questions or conversation"
-                    "\n- Asking about capabilities"
-                    "\n- Any non-email-specific requests"
-                    "\n\nRespond naturally and conversationally without using tools for casual interactions."
-                )
-            )
+            self.api_key = api_key
+            self.model_name = model
 
-            self.chat_session = self.model.start_chat(history=[])
+            # Created on the first chat, see _ensure_model
+            self.model = None
+            # Replaced by a stub when replaying traces
+            self.gmail_client = gmail_client
+            self._model_lock = asyncio.Lock()
             
-            print(f"Gemini LLM client initialized (model: {model})")
+            print(f"Gemini LLM client configured (model: {model})")
             
         except ImportError:
             raise ImportError(
@@ -51,103 +150,50 @@ class GeminiLLMClient:
             )
         except Exception as e:
             raise Exception(f"Failed to initialize Gemini: {e}")
+
+    async def _ensure_model(self):
+        """Create the Gemini model and chat session on first use"""
+        if self.model is not None:
+            return
+
+        async with self._model_lock:
+            if self.model is not None:
+                return
+
+            _load_genai().configure(api_key=self.api_key)
+
+            self.model = genai.GenerativeModel(
+                model_name=self.model_name,
+                tools=await self._get_function_declarations(),
+                system_instruction=SYSTEM_INSTRUCTION
+            )
+
+            print(f"Gemini LLM client initialized (model: {self.model_name})")
     
-    def _get_function_declarations(self) -> List[Dict[str, Any]]:
-
-        functions = [
-            genai.protos.FunctionDeclaration(
-                name="get_auth_status",
-                description="Check if the user is authenticated with Gmail. ONLY use this when the user explicitly asks about authentication status or before performing Gmail operations.",
-                parameters=genai.protos.Schema(
-                    type=genai.protos.Type.OBJECT,
-                    properties={}
+    async def _get_function_declarations(self) -> List[Any]:
+        global _tool_schemas, _function_declarations
+
+        if _function_declarations is None:
+            tools = [tool for tool in await self.gmail_client.list_tools() if tool["name"] not in UI_ONLY_TOOLS]
+
+            _tool_schemas = {tool["name"]: tool.get("inputSchema") or {} for tool in tools}
+            _function_declarations = [
+                genai.protos.FunctionDeclaration(
+                    name=tool["name"],
+                    description=inspect.cleandoc(tool.get("description") or ""),
+                    parameters=_to_schema({"type": "object", **_tool_schemas[tool["name"]]})
                 )
-            ),
-            genai.protos.FunctionDeclaration(
-                name="list_emails",
-                description=(
-                    "List emails from the user's Gmail inbox. "
-                    "ONLY use this when the user explicitly asks to see, list, check, or search their emails. "
-                    "DO NOT use for greetings, general questions, or casual conversation. "
-                    "Supports Gmail search query syntax for filtering."
-                ),
-                parameters=genai.protos.Schema(
-                    type=genai.protos.Type.OBJECT,
-                    properties={
-                        "max_results": genai.protos.Schema(
-                            type=genai.protos.Type.INTEGER,
-                            description="Maximum number of emails to return (1-100). Default is 10."
-                        ),
-                        "query": genai.protos.Schema(
-                            type=genai.protos.Type.STRING,
-                            description=(
-                                "Gmail search query to filter emails. Examples:\n"
-                                "- 'is:unread' for unread emails\n"
-                                "- 'from:user@example.com' for emails from specific sender\n"
-                                "- 'subject:meeting' for emails with 'meeting' in subject\n"
-                                "- 'has:attachment' for emails with attachments\n"
-                                "- 'after:2024/01/01' for emails after a date\n"
-                                "- Empty string for all emails"
-                            )
-                        )
-                    }
-                )
-            ),
-            genai.protos.FunctionDeclaration(
-                name="read_email",
-                description=(
-                    "Read the full content of a specific email by its ID. "
-                    "ONLY use this when the user explicitly asks to read, open, or view a specific email. "
-                    "DO NOT use for greetings or general questions. "
-                    "You must have the email ID from list_emails first."
-                ),
-                parameters=genai.protos.Schema(
-                    type=genai.protos.Type.OBJECT,
-                    properties={
-                        "email_id": genai.protos.Schema(
-                            type=genai.protos.Type.STRING,
-                            description="The Gmail message ID to read (obtained from list_emails)"
-                        )
-                    },
-                    required=["email_id"]
-                )
-            ),
-            genai.protos.FunctionDeclaration(
-                name="send_email",
-                description=(
-                    "Send an email via the user's Gmail account. "
-                    "ONLY use this when the user explicitly asks to send, compose, or write an email. "
-                    "DO NOT use for greetings or general questions."
-                ),
-                parameters=genai.protos.Schema(
-                    type=genai.protos.Type.OBJECT,
-                    properties={
-                        "to": genai.protos.Schema(
-                            type=genai.protos.Type.STRING,
-                            description="Recipient email address (e.g., 'user@example.com')"
-                        ),
-                        "subject": genai.protos.Schema(
-                            type=genai.protos.Type.STRING,
-                            description="Email subject line"
-                        ),
-                        "body": genai.protos.Schema(
-                            type=genai.protos.Type.STRING,
-                            description="Email body content in plain text"
-                        )
-                    },
-                    required=["to", "subject", "body"]
-                )
-            )
-        ]
-        
-        return functions
+                for tool in tools
+            ]
+
+        return _function_declarations
     
     async def _call_mcp_tool(self, function_name: str, function_args: Dict[str, Any]) -> Dict[str, Any]:
         print(f"  Calling MCP tool: {function_name}")
 
         try:
             # Call the MCP server through gmail_client
-            result_str = await gmail_client.call_tool(function_name, function_args)
+            result_str = await self.gmail_client.call_tool(function_name, function_args)
 
             # Parse the JSON string returned by the MCP tool
             import json
@@ -164,10 +210,54 @@ class GeminiLLMClient:
             }
             return error_result
     
-    async def chat(self, user_message: str) -> str:
+    async def _load_session(self, session_id: str):
+        """Start a chat session from the history saved in the shared state backend"""
+        history = await state_backend.aget(f"chat:{session_id}") or []
+        return self.model.start_chat(history=[genai.protos.Content(content) for content in history])
+
+    async def _save_session(self, session_id: str, chat_session):
+        await state_backend.aset(
+            f"chat:{session_id}",
+            [genai.protos.Content.to_dict(content) for content in chat_session.history],
+            ttl=CHAT_SESSION_TTL
+        )
+
+    async def _send_message(self, chat_session, content: Any):
+        """Send to Gemini with retries and a circuit breaker, off the event loop.
+
+        A failed send_message leaves the chat history untouched, so it is safe
+        to retry. It is never hedged since concurrent sends would race on the
+        history.
+        """
+        tracing.record(
+            "model_request",
+            content=content if isinstance(content, str) else genai.protos.Content.to_dict(content)
+        )
+        start = time.monotonic()
+
+        response = await asyncio.to_thread(
+            resilience.call,
+            lambda: chat_session.send_message(content),
+            endpoint="gemini.send_message"
+        )
+
+        tracing.record("model_response", duration=round(time.monotonic() - start, 4), parts=_response_parts(response))
+        return response
+
+    async def chat(self, user_message: str, session_id: str = "default") -> str:
+        with tracing.trace_recorder.turn(session_id, user_message):
+            return await self._chat(user_message, session_id)
+
+    async def _chat(self, user_message: str, session_id: str) -> str:
+
+        await self._ensure_model()
+
+        # History lives in the state backend so any API worker can continue
+        # the conversation
+        chat_session = await self._load_session(session_id)
 
         # Send message to Gemini
-        response = self.chat_session.send_message(user_message)
+        response = await self._send_message(chat_session, user_message)
         
         function_calls = []
         for part in response.parts:
@@ -184,17 +274,9 @@ class GeminiLLMClient:
                 function_name = function_call.name
 
                 function_args = {}
-                # Check if args exist before iterating
+                # Check if args exist before converting
                 if function_call.args:
-                    for key, value in function_call.args.items():
-                        if hasattr(value, 'string_value'):
-                            function_args[key] = value.string_value
-                        elif hasattr(value, 'number_value'):
-                            function_args[key] = int(value.number_value)
-                        elif hasattr(value, 'bool_value'):
-                            function_args[key] = value.bool_value
-                        else:
-                            function_args[key] = str(value)
+                    function_args = _coerce_args(function_name, _to_python(function_call.args))
 
                 print(f"\nFunction call: {function_name}")
                 print(f"  Args: {function_args}")
@@ -211,7 +293,8 @@ class GeminiLLMClient:
             print(f"\nSending {len(function_responses)} function result(s) to Gemini")
 
             try:
-                response = self.chat_session.send_message(
+                response = await self._send_message(
+                    chat_session,
                     genai.protos.Content(
                         parts=[
                             genai.protos.Part(function_response=fr)
@@ -224,6 +307,9 @@ class GeminiLLMClient:
                 # Generate a fallback response based on the function results
                 fallback_text = self._generate_fallback_response(function_responses)
                 print(f"\nAssistant (fallback): {fallback_text}\n")
+                tracing.record("response", text=fallback_text, fallback=True)
+                # The history is not saved: it would end in a function call
+                # without a response, which Gemini rejects on the next turn
                 return fallback_text
 
         final_text = ""
@@ -232,6 +318,9 @@ class GeminiLLMClient:
                 final_text += part.text
 
         print(f"\nAssistant: {final_text}\n")
+        tracing.record("response", text=final_text)
+
+        await self._save_session(session_id, chat_session)
 
         return final_text
 
@@ -279,6 +368,35 @@ class GeminiLLMClient:
             else:
                 return f"Failed to read email: {result.get('message', 'Unknown error')}"
 
+        elif function_name == "semantic_search":
+            if result.get("status") == 200:
+                matches = result.get("data", {}).get("matches", [])
+                if not matches:
+                    return "I couldn't find any matching emails."
+                return "Matching email IDs:\n" + "\n".join(
+                    f"{i}. {match['id']} (score {match['score']})" for i, match in enumerate(matches, 1)
+                )
+            else:
+                return f"Failed to search emails: {result.get('message', 'Unknown error')}"
+
+        elif function_name == "summarize_threads":
+            if result.get("status") == 200:
+                threads = result.get("data", {}).get("threads", [])
+                if not threads:
+                    return "You have no email threads to summarize."
+                return "\n\n".join(
+                    f"{i}. {thread.get('subject') or 'No subject'}\n   {thread.get('summary', '')}"
+                    for i, thread in enumerate(threads, 1)
+                )
+            else:
+                return f"Failed to summarize emails: {result.get('message', 'Unknown error')}"
+
+        elif function_name in ("mark_read", "mark_unread", "archive_emails", "trash_emails", "modify_labels"):
+            if result.get("status") == 200:
+                return f"✓ {result.get('message')}"
+            else:
+                return f"Failed to update emails: {result.get('message', 'Unknown error')}"
+
         elif function_name == "get_auth_status":
             if result.get("authenticated"):
                 return "✓ You are authenticated with Gmail."
@@ -287,13 +405,13 @@ class GeminiLLMClient:
 
         return "Request completed, but I couldn't generate a detailed response."
 
-    def reset_conversation(self):
+    def reset_conversation(self, session_id: str = "default"):
         """
         Reset the conversation history.
 
         Use this to start a fresh conversation.
         """
-        self.chat_session = self.model.start_chat(history=[])
+        state_backend.delete(f"chat:{session_id}")
         print("Conversation history reset")
 
 
@@ -1,10 +1,11 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 class EmailListRequest(BaseModel):
     """Request model for listing emails"""
     max_results: int = 10
     query: str = ""
+    sync_token: str = ""
 
 
 class EmailReadRequest(BaseModel):
@@ -12,6 +13,24 @@ class EmailReadRequest(BaseModel):
     email_id: str
 
 
+class EmailSummaryRequest(BaseModel):
+    """Request model for summarizing email threads"""
+    query: str = ""
+    max_threads: int = 10
+
+
+class EmailBulkRequest(BaseModel):
+    """Request model for changing emails selected by ID and/or search query"""
+    email_ids: List[str] = []
+    query: str = ""
+
+
+class EmailLabelRequest(EmailBulkRequest):
+    """Request model for adding or removing labels"""
+    add_labels: List[str] = []
+    remove_labels: List[str] = []
+
+
 class EmailSendRequest(BaseModel):
     """Request model for sending an email"""
     to: str
@@ -21,6 +40,7 @@ class EmailSendRequest(BaseModel):
 class ChatMessage(BaseModel):
     """Request model for chat endpoint"""
     message: str
+    session_id: str = "default"
 
 
 class ChatResponse(BaseModel):
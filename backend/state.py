@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import asyncio
+import stat
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "memory" keeps state in this process only; "sqlite" shares it between all
+# uvicorn workers on the machine (required for --workers > 1).
+STATE_BACKEND = os.getenv('STATE_BACKEND', 'memory')
+STATE_DB_PATH = Path(os.getenv('STATE_DB_PATH', str(Path.home() / '.gmail_mcp_state.sqlite3')))
+# Serialized bytes the memory backend may hold before evicting the least
+# recently used keys
+STATE_MEMORY_MAX_BYTES = int(os.getenv('STATE_MEMORY_MAX_BYTES', str(64 * 1024 * 1024)))
+
+# Seconds between sweeps that delete expired keys nobody reads again
+PURGE_INTERVAL = 60
+
+
+class StateBackend(ABC):
+    """Key-value store for OAuth flows, chat sessions and cached tool results.
+
+    Values must be JSON-serializable. ``ttl`` is in seconds; expired keys
+    read as missing and are purged periodically. The ``a*`` variants run
+    the blocking call in a thread, for use from async handlers.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str):
+        ...
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None):
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    async def adelete(self, key: str):
+        await asyncio.to_thread(self.delete, key)
+
+    async def adelete_prefix(self, prefix: str):
+        await asyncio.to_thread(self.delete_prefix, prefix)
+
+
+class MemoryStateBackend(StateBackend):
+    """State for a single process, evicting least recently used keys beyond ``max_bytes``"""
+
+    def __init__(self, max_bytes: int = STATE_MEMORY_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries: Dict[str, Tuple[str, Optional[float]]] = {}
+        self.size = 0
+        self.last_purge = time.time()
+        self.lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.pop(key, None)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self.size -= len(value)
+                return None
+
+            # Re-inserted to keep entries in least recently used order
+            self.entries[key] = entry
+
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        # Stored serialized so callers can't mutate shared state by accident,
+        # matching the shared backends
+        data = json.dumps(value)
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+
+        with self.lock:
+            if now - self.last_purge >= PURGE_INTERVAL:
+                self._purge_expired(now)
+
+            self._pop(key)
+            self.entries[key] = (data, expires_at)
+            self.size += len(data)
+
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                self._pop(next(iter(self.entries)))
+
+    def delete(self, key: str):
+        with self.lock:
+            self._pop(key)
+
+    def delete_prefix(self, prefix: str):
+        with self.lock:
+            for key in [key for key in self.entries if key.startswith(prefix)]:
+                self._pop(key)
+
+    def _pop(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[0])
+
+    def _purge_expired(self, now: float):
+        self.last_purge = now
+        for key in [key for key, (_, expires_at) in self.entries.items()
+                    if expires_at is not None and expires_at <= now]:
+            self._pop(key)
+
+
+class SQLiteStateBackend(StateBackend):
+    """State shared across processes through one SQLite database in WAL mode"""
+
+    def __init__(self, path: Path = STATE_DB_PATH):
+        self.path = path
+        self.local = threading.local()
+        self.last_purge = 0.0
+
+        # Chat histories (with email bodies) and cached tool results live
+        # here; SQLite gives its -wal and -shm files the database's mode
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+        for file in (path, Path(f"{path}-wal"), Path(f"{path}-shm")):
+            if file.exists() and stat.S_IMODE(file.stat().st_mode) & 0o077:
+                file.chmod(0o600)
+
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS state_expires_at ON state (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections can't be shared between threads
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM state WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        value, expires_at = row
+        if expires_at is not None and expires_at <= time.time():
+            self.delete(key)
+            return None
+
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._connection() as connection:
+            # Each worker sweeps now and then; a race only means an extra sweep
+            if now - self.last_purge >= PURGE_INTERVAL:
+                self.last_purge = now
+                connection.execute("DELETE FROM state WHERE expires_at <= ?", (now,))
+
+            connection.execute(
+                "INSERT OR REPLACE INTO state (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+
+    def delete(self, key: str):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM state WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix: str):
+        with self._connection() as connection:
+            connection.execute(
+                "DELETE FROM state WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            )
+
+
+def create_state_backend() -> StateBackend:
+    if STATE_BACKEND == 'memory':
+        return MemoryStateBackend()
+    if STATE_BACKEND == 'sqlite':
+        return SQLiteStateBackend()
+    raise ValueError(f"Unknown STATE_BACKEND: {STATE_BACKEND}")
+
+
+state_backend = create_state_backend()
@@ -0,0 +1,40 @@
+"""MCP server over stdio with slow and fast tools, standing in for the Gmail server"""
+import sys
+import json
+import time
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mcp.server.fastmcp import FastMCP
+from gmail_mcp.concurrency import offload
+
+mcp = FastMCP("Stub MCP Server")
+
+
+def result(token: str, started: float) -> str:
+    return json.dumps({
+        "status": 200,
+        "message": "ok",
+        "data": {"token": token, "started": started, "finished": time.time(),
+                 "thread": threading.current_thread().name}
+    })
+
+
+@mcp.tool()
+@offload(concurrency=4)
+def slow_tool(token: str, seconds: float) -> str:
+    started = time.time()
+    time.sleep(seconds)
+    return result(token, started)
+
+
+@mcp.tool()
+@offload(concurrency=4)
+def fast_tool(token: str) -> str:
+    return result(token, time.time())
+
+
+if __name__ == "__main__":
+    mcp.run()
@@ -0,0 +1,38 @@
+import json
+
+import anyio
+import pytest
+
+from benchmarks.fake_gmail import FakeGmail
+from gmail_mcp import gmail_server
+
+
+@pytest.fixture
+def gmail(monkeypatch):
+    gmail = FakeGmail(message_count=1200)
+    monkeypatch.setattr(gmail_server, "ensure_auth", lambda: gmail)
+    return gmail
+
+
+def test_query_changes_every_match_in_batches(gmail):
+    result = json.loads(anyio.run(gmail_server.archive_emails, None, "in:inbox"))
+
+    assert result["data"] == {"count": 1200, "truncated": False}
+    assert gmail.calls["messages.batchModify"] == 2
+    assert all("INBOX" not in message["labelIds"] for message in gmail.mailbox.values())
+
+
+def test_selection_past_limit_is_reported(gmail, monkeypatch):
+    monkeypatch.setattr(gmail_server, "BULK_MODIFY_LIMIT", 1000)
+    result = json.loads(anyio.run(gmail_server.trash_emails, None, "in:inbox"))
+
+    assert result["data"] == {"count": 1000, "truncated": True}
+    assert "limit of 1000" in result["message"]
+    assert len(gmail.visible_ids()) == 200
+
+
+def test_explicit_ids_at_limit_are_not_truncated(gmail, monkeypatch):
+    monkeypatch.setattr(gmail_server, "BULK_MODIFY_LIMIT", 3)
+    result = json.loads(anyio.run(gmail_server.mark_read, gmail.visible_ids()[:3], ""))
+
+    assert result["data"] == {"count": 3, "truncated": False}
@@ -0,0 +1,91 @@
+import json
+
+import anyio
+import pytest
+
+from benchmarks.fake_gmail import FakeGmail
+from gmail_mcp import gmail_server
+
+
+@pytest.fixture
+def gmail(monkeypatch):
+    gmail = FakeGmail(message_count=30)
+    monkeypatch.setattr(gmail_server, "ensure_auth", lambda: gmail)
+    return gmail
+
+
+def sync(sync_token: str = "", max_results: int = 10):
+    return json.loads(anyio.run(gmail_server.sync_emails, max_results, "", sync_token))
+
+
+def test_unchanged_mailbox_is_not_modified(gmail):
+    token = sync()["data"]["sync_token"]
+    gmail.calls.clear()
+
+    assert sync(token)["status"] == 304
+    assert gmail.calls == {"users.getProfile": 1}
+
+
+def test_new_email_is_sent_alone(gmail):
+    token = sync()["data"]["sync_token"]
+    new_id = gmail.receive()
+    gmail.calls.clear()
+
+    data = sync(token)["data"]
+    assert data["full"] is False
+    assert [email["id"] for email in data["added"]] == [new_id]
+    assert gmail.calls["messages.get"] == 1
+
+
+def test_trashing_listed_emails_returns_full_window(gmail):
+    token = sync()["data"]["sync_token"]
+    for email_id in gmail.visible_ids()[:10][:3]:
+        gmail.modify(email_id, add=["TRASH"])
+
+    data = sync(token)["data"]
+    assert data["full"] is True
+    assert [email["id"] for email in data["messages"]] == gmail.visible_ids()[:10]
+    assert data["count"] == 10
+
+
+def test_untrashed_email_is_added(gmail):
+    trashed = gmail.visible_ids()[:10][5]
+    gmail.modify(trashed, add=["TRASH"])
+    token = sync()["data"]["sync_token"]
+
+    gmail.modify(trashed, remove=["TRASH"])
+    data = sync(token)["data"]
+    assert data["full"] is False
+    assert [email["id"] for email in data["added"]] == [trashed]
+    assert data["changed"] == []
+
+
+def test_label_changes_need_no_metadata_and_do_not_count_against_window(gmail):
+    token = sync(max_results=2)["data"]["sync_token"]
+    old_ids = list(gmail.mailbox)[:5]
+    for email_id in old_ids:
+        gmail.modify(email_id, remove=["UNREAD"])
+    gmail.calls.clear()
+
+    data = sync(token, max_results=2)["data"]
+    assert data["full"] is False
+    assert data["changed"] == [{"id": email_id, "labels": ["INBOX"]} for email_id in old_ids]
+    assert "messages.get" not in gmail.calls
+
+
+def test_draft_churn_does_not_force_full_list(gmail):
+    token = sync()["data"]["sync_token"]
+    for _ in range(3):
+        gmail.delete(gmail.receive(labels=["DRAFT"]))
+
+    data = sync(token)["data"]
+    assert data["full"] is False
+    assert data["added"] == []
+
+
+def test_expired_history_falls_back_to_full_list(gmail):
+    token = sync()["data"]["sync_token"]
+    gmail.receive()
+    gmail.expire_history()
+
+    assert sync(token)["data"]["full"] is True
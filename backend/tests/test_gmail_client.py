@@ -0,0 +1,82 @@
+import sys
+import json
+import time
+import asyncio
+from pathlib import Path
+
+import anyio
+import pytest
+
+import gmail_client as gmail_client_module
+from gmail_client import GmailClient
+from gmail_mcp import concurrency
+from gmail_mcp.concurrency import offload
+
+STUB_SERVER = Path(__file__).resolve().parent / "stub_mcp_server.py"
+
+
+@pytest.fixture
+def client():
+    client = GmailClient(command=[sys.executable, str(STUB_SERVER)])
+    client.start()
+    yield client
+    client.stop()
+
+
+def test_concurrent_tool_calls_overlap(client):
+    async def run():
+        calls = [client.call_tool("slow_tool", {"token": f"slow-{i}", "seconds": 0.5}) for i in range(4)]
+        calls += [client.call_tool("fast_tool", {"token": f"fast-{i}"}) for i in range(4)]
+
+        started = time.monotonic()
+        results = await asyncio.gather(*calls)
+        return time.monotonic() - started, [json.loads(result)["data"] for result in results]
+
+    elapsed, results = asyncio.run(run())
+
+    # Every caller gets the response to its own request
+    assert [r["token"] for r in results] == [f"slow-{i}" for i in range(4)] + [f"fast-{i}" for i in range(4)]
+
+    # Four 0.5 s calls in well under 2 s: they ran at the same time
+    assert elapsed < 1.5
+    slow = results[:4]
+    assert max(r["started"] for r in slow) < min(r["finished"] for r in slow)
+
+    # Fast calls aren't stuck behind the slow ones
+    assert max(r["finished"] for r in results[4:]) < min(r["finished"] for r in slow)
+
+
+def test_request_timeout_does_not_break_later_calls(client, monkeypatch):
+    monkeypatch.setattr(gmail_client_module, "REQUEST_TIMEOUT", 0.2)
+
+    async def run():
+        with pytest.raises(TimeoutError):
+            await client.call_tool("slow_tool", {"token": "late", "seconds": 0.5})
+        return json.loads(await client.call_tool("fast_tool", {"token": "next"}))
+
+    assert asyncio.run(run())["data"]["token"] == "next"
+    assert client.pending == {}
+
+
+def test_offload_rejects_calls_beyond_queue_limit(monkeypatch):
+    monkeypatch.setattr(concurrency, "QUEUE_LIMIT", 2)
+
+    @offload(concurrency=1)
+    def blocking_tool() -> str:
+        time.sleep(0.3)
+        return json.dumps({"status": 200})
+
+    async def run():
+        results = []
+
+        async def call():
+            results.append(json.loads(await blocking_tool()))
+
+        async with anyio.create_task_group() as group:
+            for _ in range(4):
+                group.start_soon(call)
+        return results
+
+    statuses = sorted(result["status"] for result in anyio.run(run))
+    # One running, two queued, the fourth rejected
+    assert statuses == [200, 200, 200, 503]
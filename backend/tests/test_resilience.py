@@ -0,0 +1,169 @@
+import time
+import json
+import random
+import threading
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from gmail_mcp import resilience
+
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_ATTEMPTS", 3)
+    monkeypatch.setattr(resilience, "RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(resilience, "RETRY_MAX_DELAY", 0.004)
+    monkeypatch.setattr(resilience, "HEDGE_PERCENTILE", 0)
+    monkeypatch.setattr(resilience, "_endpoints", {})
+
+
+def http_error(status: int, reason: str = "backendError") -> HttpError:
+    content = json.dumps({"error": {"code": status, "errors": [{"reason": reason}]}}).encode()
+    return HttpError(httplib2.Response({"status": status}), content)
+
+
+class FlakyEndpoint:
+    """Fails a fraction of calls with the given error"""
+
+    def __init__(self, failure_rate: float, error=lambda: http_error(503), seed: int = 1):
+        self.failure_rate = failure_rate
+        self.error = error
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.random.random() < self.failure_rate:
+            raise self.error()
+        return "ok"
+
+
+def success_rate(endpoint: FlakyEndpoint, calls: int, **kwargs) -> float:
+    succeeded = 0
+    for _ in range(calls):
+        try:
+            resilience.call(endpoint, endpoint="test.flaky", **kwargs)
+            succeeded += 1
+        except (HttpError, resilience.CircuitOpenError):
+            pass
+    return succeeded / calls
+
+
+def test_retries_raise_success_rate_under_injected_faults(monkeypatch):
+    resilience.get_endpoint("test.flaky").breaker.failure_threshold = 1000
+
+    # 30% failures and 3 attempts: about 1 - 0.3^3 = 97.3% succeed
+    assert success_rate(FlakyEndpoint(0.3), 500) > 0.95
+
+    monkeypatch.setattr(resilience, "RETRY_ATTEMPTS", 1)
+    assert success_rate(FlakyEndpoint(0.3), 500) < 0.8
+
+
+@pytest.mark.parametrize("reason", ["rateLimitExceeded", "userRateLimitExceeded"])
+def test_gmail_403_rate_limits_are_retried(reason):
+    endpoint = FlakyEndpoint(0, seed=0)
+    errors = [http_error(403, reason)]
+
+    def fn():
+        if errors:
+            raise errors.pop()
+        return endpoint()
+
+    assert resilience.is_transient(http_error(403, reason))
+    # Even non-idempotent calls: the request was rejected before it was processed
+    assert resilience.call(fn, endpoint="test.rate_limited", idempotent=False) == "ok"
+
+
+def test_network_errors_of_the_pooled_transport_are_transient():
+    from urllib3.exceptions import NewConnectionError, ProtocolError, ReadTimeoutError
+
+    assert resilience.is_transient(ReadTimeoutError(None, "/", "Read timed out."))
+    assert resilience.is_transient(ProtocolError("Connection aborted."))
+    assert resilience.is_transient(NewConnectionError(None, "Connection refused"))
+
+
+def test_other_403_and_non_idempotent_5xx_are_not_retried():
+    assert not resilience.is_transient(http_error(403, "insufficientPermissions"))
+
+    endpoint = FlakyEndpoint(1.0)
+    with pytest.raises(HttpError):
+        resilience.call(endpoint, endpoint="test.send", idempotent=False)
+    assert endpoint.calls == 1
+
+
+def test_retry_messages_go_to_stderr(capsys):
+    errors = [http_error(503)]
+
+    def fn():
+        if errors:
+            raise errors.pop()
+        return "ok"
+
+    resilience.call(fn, endpoint="test.logging")
+    captured = capsys.readouterr()
+    # stdout is the MCP server's JSON-RPC channel
+    assert captured.out == ""
+    assert "Transient error from test.logging" in captured.err
+
+
+def test_circuit_opens_and_recovers(monkeypatch):
+    monkeypatch.setattr(resilience, "RETRY_ATTEMPTS", 1)
+    breaker = resilience.get_endpoint("test.breaker").breaker
+    breaker.failure_threshold = 3
+    breaker.reset_timeout = 0.05
+
+    failing = FlakyEndpoint(1.0)
+    for _ in range(3):
+        with pytest.raises(HttpError):
+            resilience.call(failing, endpoint="test.breaker")
+
+    with pytest.raises(resilience.CircuitOpenError):
+        resilience.call(failing, endpoint="test.breaker")
+    assert failing.calls == 3
+
+    time.sleep(0.06)
+    assert resilience.call(lambda: "ok", endpoint="test.breaker") == "ok"
+
+
+def warm_up(endpoint: str, seconds: float):
+    for _ in range(resilience.HEDGE_MIN_SAMPLES):
+        resilience.call(lambda: time.sleep(seconds), endpoint=endpoint, hedge=True)
+
+
+def test_hedged_call_returns_backup_and_records_primary_latency(monkeypatch):
+    monkeypatch.setattr(resilience, "HEDGE_PERCENTILE", 90)
+    warm_up("test.hedge", 0.01)
+
+    calls = []
+
+    def fn():
+        calls.append(threading.current_thread().name)
+        time.sleep(0.5 if len(calls) == 1 else 0.01)
+        return len(calls)
+
+    started = time.monotonic()
+    assert resilience.call(fn, endpoint="test.hedge", hedge=True) == 2
+    assert time.monotonic() - started < 0.3
+
+    # The slow primary's own latency is recorded once it finishes, not the hedged one
+    time.sleep(0.6)
+    samples = list(resilience.get_endpoint("test.hedge").latencies.samples)
+    assert max(samples) >= 0.5
+
+
+def test_hedging_never_queues_behind_busy_hedge_threads(monkeypatch):
+    monkeypatch.setattr(resilience, "HEDGE_PERCENTILE", 90)
+    warm_up("test.hedge_busy", 0.001)
+
+    # With every hedge thread taken, the call runs on the caller's thread
+    for _ in range(resilience.HEDGE_MAX_WORKERS):
+        assert resilience._hedge_slots.acquire(blocking=False)
+    try:
+        thread = resilience.call(lambda: threading.current_thread().name, endpoint="test.hedge_busy", hedge=True)
+    finally:
+        for _ in range(resilience.HEDGE_MAX_WORKERS):
+            resilience._hedge_slots.release()
+
+    assert thread == threading.current_thread().name
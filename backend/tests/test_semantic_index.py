@@ -0,0 +1,72 @@
+import os
+import pickle
+
+from google.oauth2.credentials import Credentials
+
+from gmail_mcp import auth
+from gmail_mcp.semantic_index import SemanticIndex
+
+
+def make_index() -> SemanticIndex:
+    index = SemanticIndex(dim=256, capacity=2)
+    index.add_many([
+        ("a", "Contract renewal for the office lease"),
+        ("b", "Team lunch on Friday"),
+        ("c", "Your invoice for March"),
+    ])
+    return index
+
+
+def test_search_ranks_related_email_first():
+    assert make_index().search("renew the contract", top_k=1)[0][0] == "a"
+
+
+def test_search_without_words_returns_nothing():
+    assert make_index().search("??? !!!") == []
+
+
+def test_search_leaves_out_unrelated_emails():
+    assert all(score > 0 for _, score in make_index().search("zzzz qqqq", top_k=3))
+
+
+def test_clear_and_remove():
+    index = make_index()
+    index.remove("a")
+    assert [email_id for email_id, _ in index.search("contract renewal lease")] != ["a"]
+
+    index.clear()
+    assert len(index) == 0
+    assert index.search("invoice") == []
+
+    index.add("d", "invoice reminder")
+    assert index.search("invoice")[0][0] == "d"
+
+
+def test_credentials_change_notifies_listeners(tmp_path, monkeypatch):
+    token_path = tmp_path / "token.pickle"
+    monkeypatch.setattr(auth, "TOKEN_PATH", token_path)
+    monkeypatch.setattr(auth, "_credentials", None)
+    monkeypatch.setattr(auth, "_credentials_mtime", None)
+    monkeypatch.setattr(auth, "_credential_listeners", [])
+
+    changes = []
+    auth.on_credentials_change(lambda: changes.append(True))
+
+    def login(token: str, mtime_ns: int):
+        with open(token_path, 'wb') as f:
+            pickle.dump(Credentials(token=token), f)
+        os.utime(token_path, ns=(mtime_ns, mtime_ns))
+
+    login("first", 1_000_000_000)
+    assert auth._load_credentials().token == "first"
+    assert auth._load_credentials().token == "first"
+    assert changes == []
+
+    # Another account signs in through the API process
+    login("second", 2_000_000_000)
+    assert auth._load_credentials().token == "second"
+    assert changes == [True]
+
+    token_path.unlink()
+    assert auth._load_credentials() is None
+    assert changes == [True, True]
@@ -0,0 +1,115 @@
+import os
+import sys
+import json
+import stat
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from gmail_mcp import spool
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def spool_dir(tmp_path, monkeypatch):
+    path = tmp_path / "spool"
+    monkeypatch.setattr(spool, "SPOOL_DIR", path)
+    return path
+
+
+def mode(path: Path) -> int:
+    return stat.S_IMODE(path.stat().st_mode)
+
+
+def test_spool_is_private_to_its_owner(spool_dir):
+    old_umask = os.umask(0o022)
+    try:
+        handle, size = spool.write_spool([b"hello ", b"world"])
+    finally:
+        os.umask(old_umask)
+
+    assert size == 11
+    assert spool.spool_path(handle).read_bytes() == b"hello world"
+    assert mode(spool_dir) == 0o700
+    assert mode(spool_dir / handle) == 0o600
+
+
+def test_open_spool_dir_is_made_private(spool_dir):
+    spool_dir.mkdir(mode=0o777)
+    os.chmod(spool_dir, 0o777)
+    spool.write_spool([b"x"])
+
+    assert mode(spool_dir) == 0o700
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX ownership")
+def test_spool_dir_of_another_user_is_refused(spool_dir, monkeypatch):
+    spool_dir.mkdir()
+    monkeypatch.setattr(os, "getuid", lambda: spool_dir.stat().st_uid + 1)
+
+    with pytest.raises(PermissionError):
+        spool.write_spool([b"secret"])
+    assert list(spool_dir.iterdir()) == []
+
+
+def test_clear_spool_leaves_other_files_alone(spool_dir):
+    handle, _ = spool.write_spool([b"x"])
+    (spool_dir / "notes.txt").write_text("keep")
+    spool.clear_spool()
+
+    assert spool.spool_path(handle) is None
+    assert (spool_dir / "notes.txt").exists()
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="ru_maxrss in KiB on Linux")
+def test_reading_50mb_email_keeps_peak_memory_bounded(tmp_path):
+    """Peak RSS of read_email for a 50 MB body, after the Gmail response is held.
+
+    The fake service hands read_email the parsed response with its ~67 MB
+    base64 body already in memory, as the real client would after
+    messages.get. The measured growth covers the rest: decoding and spooling
+    the body, the inline preview, indexing and the JSON reply.
+    """
+    script = r"""
+import gc, json, base64, resource
+import anyio
+from benchmarks.fake_gmail import FakeGmail
+from gmail_mcp import gmail_server
+
+# A line of a multiple of 3 bytes encodes on its own, so the body's base64 is built without the body
+line = b"Quarterly figures for the northern region follow, see the table below.\n"
+line += b" " * (-len(line) % 3)
+copies = 50 * 1024 * 1024 // len(line)
+gmail = FakeGmail()
+email_id = gmail.receive(subject="Large")
+gmail.mailbox[email_id]["payload"]["body"] = {
+    "size": len(line) * copies,
+    "data": base64.urlsafe_b64encode(line).decode() * copies
+}
+gmail_server.ensure_auth = lambda: gmail
+gc.collect()
+
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+reply = anyio.run(gmail_server.read_email, email_id)
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+data = json.loads(reply)["data"]
+print(json.dumps({"growth": after - before, "reply": len(reply), "body_size": data["body_size"]}))
+"""
+    env = {
+        **os.environ,
+        "HOME": str(tmp_path),
+        "GMAIL_SPOOL_DIR": str(tmp_path / "spool"),
+        "PYTHONPATH": str(BACKEND_DIR),
+    }
+    result = subprocess.run([sys.executable, "-c", script], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert measured["body_size"] > 49 * MB
+    assert measured["reply"] < spool.INLINE_BODY_LIMIT * 2
+    # Holding the decoded body would add 50 MB; streaming it to the spool adds a few
+    assert measured["growth"] < 16 * MB, measured
@@ -0,0 +1,210 @@
+import os
+import sys
+import json
+import time
+import base64
+import hashlib
+import subprocess
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+import pytest
+
+import state
+from state import StateBackend, MemoryStateBackend, SQLiteStateBackend
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path) -> StateBackend:
+    if request.param == "memory":
+        return MemoryStateBackend()
+    return SQLiteStateBackend(tmp_path / "state.sqlite3")
+
+
+def test_state_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StateBackend()
+
+
+def test_get_set_delete(backend):
+    backend.set("chat:a", [{"role": "user"}])
+    backend.set("chat:b", 1)
+    backend.set("tool:c", "result")
+    assert backend.get("chat:a") == [{"role": "user"}]
+
+    backend.delete("chat:a")
+    assert backend.get("chat:a") is None
+
+    backend.delete_prefix("chat:")
+    assert backend.get("chat:b") is None
+    assert backend.get("tool:c") == "result"
+
+
+def test_expired_keys_read_as_missing_and_are_purged(backend, monkeypatch):
+    monkeypatch.setattr(state, "PURGE_INTERVAL", 0)
+
+    for i in range(5):
+        backend.set(f"tool:{i}", "x" * 100, ttl=0.01)
+    time.sleep(0.02)
+    assert backend.get("tool:0") is None
+
+    # Keys that are never read again are removed by the next write
+    backend.set("chat:kept", "y")
+    if isinstance(backend, MemoryStateBackend):
+        assert list(backend.entries) == ["chat:kept"]
+        assert backend.size == len(json.dumps("y"))
+    else:
+        rows = backend._connection().execute("SELECT key FROM state").fetchall()
+        assert rows == [("chat:kept",)]
+
+
+def test_sqlite_files_are_private(tmp_path):
+    path = tmp_path / "state.sqlite3"
+    old_umask = os.umask(0o022)
+    try:
+        backend = SQLiteStateBackend(path)
+        backend.set("chat:a", "history")
+    finally:
+        os.umask(old_umask)
+
+    for file in (path, Path(f"{path}-wal"), Path(f"{path}-shm")):
+        assert file.stat().st_mode & 0o777 == 0o600, file
+
+
+def test_memory_backend_evicts_least_recently_used_beyond_max_bytes():
+    backend = MemoryStateBackend(max_bytes=350)
+    for i in range(3):
+        backend.set(f"tool:{i}", "x" * 100)
+    assert backend.get("tool:0") is not None
+
+    backend.set("tool:3", "x" * 100)
+
+    assert backend.get("tool:1") is None
+    assert all(backend.get(f"tool:{i}") is not None for i in (0, 2, 3))
+    assert backend.size <= 350
+
+
+def test_async_variants_run_off_the_event_loop(backend):
+    import asyncio
+
+    async def run():
+        await backend.aset("oauth:s", {"code_verifier": "v"}, ttl=60)
+        value = await backend.aget("oauth:s")
+        await backend.adelete("oauth:s")
+        return value, await backend.aget("oauth:s")
+
+    assert asyncio.run(run()) == ({"code_verifier": "v"}, None)
+
+
+def run_worker(tmp_path: Path, script: str) -> str:
+    """Run a script in a fresh process, like another uvicorn worker sharing the sqlite state"""
+    env = {
+        **os.environ,
+        "STATE_BACKEND": "sqlite",
+        "STATE_DB_PATH": str(tmp_path / "state.sqlite3"),
+        "HOME": str(tmp_path),
+        "GEMINI_API_KEY": "test",
+        "PYTHONPATH": str(BACKEND_DIR),
+    }
+    result = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_oauth_callback_served_by_another_worker(tmp_path):
+    (tmp_path / "gmail_mcp_credentials.json").write_text(json.dumps({"web": {
+        "client_id": "client", "client_secret": "secret",
+        "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+        "token_uri": "https://oauth2.googleapis.com/token",
+    }}))
+
+    location = run_worker(tmp_path, """
+from fastapi.testclient import TestClient
+import app
+response = TestClient(app.app).get("/auth/start", follow_redirects=False)
+print(response.headers["location"])
+""")
+    query = parse_qs(urlparse(location).query)
+    oauth_state, challenge = query["state"][0], query["code_challenge"][0]
+
+    # The callback worker rebuilds the flow with the verifier the start worker
+    # stored; only the token request to Google is stubbed
+    outcome = json.loads(run_worker(tmp_path, f"""
+import json, time, pickle
+from fastapi.testclient import TestClient
+from google_auth_oauthlib.flow import Flow
+import app
+
+exchanged = {{}}
+def fetch_token(self, code):
+    exchanged.update(code=code, code_verifier=self.code_verifier)
+    self.oauth2session.token = {{"access_token": "access", "refresh_token": "refresh", "token_type": "Bearer",
+                                 "expires_at": time.time() + 3600}}
+Flow.fetch_token = fetch_token
+
+client = TestClient(app.app)
+first = client.get("/auth/callback", params={{"code": "c", "state": "{oauth_state}"}})
+second = client.get("/auth/callback", params={{"code": "c", "state": "{oauth_state}"}})
+with open(app.TOKEN_PATH, "rb") as f:
+    token = pickle.load(f)
+print(json.dumps({{
+    "exchanged": exchanged, "first": first.status_code, "token": token.token,
+    "second": second.json()["detail"]
+}}))
+"""))
+
+    verifier = outcome["exchanged"]["code_verifier"]
+    expected = base64.urlsafe_b64encode(hashlib.sha256(verifier.encode()).digest()).rstrip(b"=").decode()
+    assert expected == challenge
+    assert outcome["first"] == 200
+    assert outcome["token"] == "access"
+    # Each flow can only be completed once
+    assert outcome["second"] == "OAuth flow not started"
+
+
+# A Gemini model stand-in that answers every message and reports the history
+# each chat was started with
+STUB_MODEL = """
+import json
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+import app, llm_client
+
+genai = llm_client._load_genai()
+started_with = []
+
+class StubChat:
+    def __init__(self, history):
+        self.history = list(history)
+        started_with.append([content.parts[0].text for content in self.history])
+
+    def send_message(self, content):
+        reply = f"You said: {content}"
+        self.history += [
+            genai.protos.Content(role="user", parts=[genai.protos.Part(text=content)]),
+            genai.protos.Content(role="model", parts=[genai.protos.Part(text=reply)]),
+        ]
+        return SimpleNamespace(parts=[SimpleNamespace(text=reply)])
+
+llm_client.llm_client.model = SimpleNamespace(start_chat=lambda history: StubChat(history))
+client = TestClient(app.app)
+"""
+
+
+def test_chat_history_continues_on_another_worker(tmp_path):
+    pytest.importorskip("google.generativeai")
+
+    run_worker(tmp_path, STUB_MODEL + """
+print(client.post("/api/chat", json={"message": "Hi, I'm Sam", "session_id": "s1"}).json()["response"])
+""")
+
+    outcome = json.loads(run_worker(tmp_path, STUB_MODEL + """
+response = client.post("/api/chat", json={"message": "What's my name?", "session_id": "s1"}).json()
+print(json.dumps({"response": response["response"], "started_with": started_with}))
+"""))
+
+    assert outcome["response"] == "You said: What's my name?"
+    assert outcome["started_with"] == [["Hi, I'm Sam", "You said: Hi, I'm Sam"]]
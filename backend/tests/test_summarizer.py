@@ -0,0 +1,102 @@
+import re
+import json
+import threading
+
+from gmail_mcp.summarizer import SummaryCache, ThreadSummarizer, estimate_tokens
+
+
+class FakeModel:
+    """Summarizes every thread in the prompt and counts the requests"""
+
+    def __init__(self, valid_json: bool = True):
+        self.prompts = []
+        self.valid_json = valid_json
+
+    def __call__(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        thread_ids = re.findall(r"### THREAD (\S+)", prompt)
+        if not self.valid_json:
+            return f"Summary of {', '.join(thread_ids)}"
+        return json.dumps({thread_id: f"Summary of {thread_id}" for thread_id in thread_ids})
+
+
+def load_thread(thread_id: str) -> str:
+    return f"Messages of {thread_id}. " * 20
+
+
+def test_threads_share_requests_and_cache_hits_skip_the_model():
+    model = FakeModel()
+    summarizer = ThreadSummarizer(model, cache=SummaryCache(path=None))
+    threads = [(f"t{i}", f"m{i}") for i in range(10)]
+
+    summaries = summarizer.summarize(threads, load_thread)
+    assert summaries == {f"t{i}": f"Summary of t{i}" for i in range(10)}
+    assert len(model.prompts) == 1
+
+    summarizer.summarize(threads, load_thread)
+    assert len(model.prompts) == 1
+
+    # Only the thread with a new message is summarized again
+    threads[3] = ("t3", "m3-reply")
+    summarizer.summarize(threads, load_thread)
+    assert len(model.prompts) == 2
+    assert re.findall(r"### THREAD (\S+)", model.prompts[-1]) == ["t3"]
+
+
+def test_batches_stay_within_token_budget():
+    model = FakeModel()
+    summarizer = ThreadSummarizer(model, cache=SummaryCache(path=None), token_budget=500)
+
+    summaries = summarizer.summarize([(f"t{i}", "m") for i in range(12)], load_thread)
+
+    assert len(summaries) == 12
+    assert 1 < len(model.prompts) < 12
+    assert all(estimate_tokens(prompt) <= 500 for prompt in model.prompts)
+
+
+def test_unparseable_reply_is_split_until_one_thread_per_request():
+    model = FakeModel(valid_json=False)
+    summarizer = ThreadSummarizer(model, cache=SummaryCache(path=None))
+
+    summaries = summarizer.summarize([("t1", "m"), ("t2", "m")], load_thread)
+
+    assert summaries == {"t1": "Summary of t1", "t2": "Summary of t2"}
+    assert len(model.prompts) == 3
+
+
+def test_cache_keeps_most_recently_used_entries():
+    cache = SummaryCache(path=None, max_entries=2)
+    cache.put("t1", "m", "one")
+    cache.put("t2", "m", "two")
+    assert cache.get("t1", "m") == "one"
+
+    cache.put("t3", "m", "three")
+
+    assert cache.get("t2", "m") is None
+    assert cache.get("t1", "m") == "one"
+    assert cache.get("t3", "m") == "three"
+
+
+def test_concurrent_saves_leave_a_valid_file(tmp_path):
+    path = tmp_path / "summaries.json"
+    cache = SummaryCache(path=path)
+    errors = []
+
+    def save(i):
+        try:
+            for j in range(20):
+                cache.put(f"t{i}-{j}", "m", "summary " * 50)
+                cache.save()
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=save, args=(i,)) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    assert len(json.loads(path.read_text())) == 80
+    assert list(tmp_path.glob("*.tmp")) == []
+    assert len(SummaryCache(path=path).entries) == 80
@@ -0,0 +1,39 @@
+import os
+import sys
+import json
+import sqlite3
+import subprocess
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_replay_leaves_the_shared_state_backend_untouched(tmp_path):
+    pytest.importorskip("google.generativeai")
+
+    trace_path = tmp_path / "trace.jsonl"
+    trace_path.write_text(json.dumps({
+        "session_id": "default",
+        "message": "hi",
+        "duration": 0.5,
+        "events": [
+            {"type": "model_request", "t": 0.0, "content": "hi"},
+            {"type": "model_response", "t": 0.4, "duration": 0.4, "parts": [{"text": "Hello!"}]},
+            {"type": "response", "t": 0.5, "text": "Hello!"},
+        ]
+    }) + "\n")
+
+    db_path = tmp_path / "state.sqlite3"
+    result = subprocess.run(
+        [sys.executable, "tracing.py", "replay", str(trace_path), "--speed", "0"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=60,
+        env={**os.environ, "STATE_BACKEND": "sqlite", "STATE_DB_PATH": str(db_path),
+             "GEMINI_API_KEY": "test", "CHAT_TRACE_PATH": ""}
+    )
+
+    assert result.returncode == 0, result.stderr
+    assert "Turn 1:" in result.stdout and "same response" in result.stdout
+    rows = sqlite3.connect(db_path).execute("SELECT key FROM state WHERE key LIKE 'chat:%'").fetchall()
+    assert rows == []
@@ -0,0 +1,68 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from google.oauth2.credentials import Credentials
+
+from gmail_mcp.transport import PooledHttp
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+        authorization = self.headers.get("Authorization")
+        status = 401 if authorization == "Bearer expired" else 200
+        body = json.dumps({"path": self.path, "authorization": authorization}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+    server.daemon_threads = True
+    server.connections = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", server
+    server.shutdown()
+
+
+class RefreshingCredentials(Credentials):
+    """Starts with a token the server rejects and refreshes to a good one"""
+
+    def refresh(self, request):
+        self.token = "fresh"
+
+
+def test_requests_carry_credentials_and_reuse_connections(server):
+    url, http_server = server
+    http = PooledHttp(Credentials(token="token"))
+
+    for i in range(5):
+        response, content = http.request(f"{url}/messages/{i}")
+        assert response.status == 200
+        assert json.loads(content) == {"path": f"/messages/{i}", "authorization": "Bearer token"}
+
+    assert len(http_server.connections) == 1
+    http.close()
+
+
+def test_rejected_token_is_refreshed_and_request_retried(server):
+    url, _ = server
+    http = PooledHttp(RefreshingCredentials(token="expired"))
+
+    response, content = http.request(f"{url}/messages/1")
+
+    assert response.status == 200
+    assert json.loads(content)["authorization"] == "Bearer fresh"
+    http.close()
@@ -0,0 +1,256 @@
+"""
+Chat turn tracing, offline replay and per-request profiling.
+
+Set CHAT_TRACE_PATH to append one JSON line per chat turn with every model
+request/response and MCP tool call and their timings. Replay a trace against
+stubbed Gemini and Gmail backends that answer with the recorded responses
+after the recorded latencies:
+
+    python tracing.py replay traces.jsonl [--speed 1.0]
+
+Set PROFILE_REQUESTS to "cprofile" or "pyinstrument" and send an
+"X-Profile: 1" header to profile a single API request into PROFILE_DIR.
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+import contextvars
+from pathlib import Path
+from types import SimpleNamespace
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHAT_TRACE_PATH = os.getenv('CHAT_TRACE_PATH')
+PROFILE_REQUESTS = os.getenv('PROFILE_REQUESTS')
+PROFILE_DIR = Path(os.getenv('PROFILE_DIR', 'profiles'))
+
+_current_turn: contextvars.ContextVar[Optional["Turn"]] = contextvars.ContextVar('chat_trace_turn', default=None)
+
+
+class Turn:
+    """Events of one chat turn, timed from its start"""
+
+    def __init__(self, session_id: str, message: str):
+        self.session_id = session_id
+        self.message = message
+        self.started = time.monotonic()
+        self.events: List[Dict[str, Any]] = []
+
+    def record(self, event_type: str, **fields):
+        self.events.append({
+            "type": event_type,
+            "t": round(time.monotonic() - self.started, 4),
+            **fields
+        })
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "message": self.message,
+            "duration": round(time.monotonic() - self.started, 4),
+            "events": self.events
+        }
+
+
+class TraceRecorder:
+
+    def __init__(self, path: Optional[str] = CHAT_TRACE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def turn(self, session_id: str, message: str) -> Iterator[Optional[Turn]]:
+        """Record the chat turn run inside this block, if tracing is enabled"""
+        if not self.path:
+            yield None
+            return
+
+        turn = Turn(session_id, message)
+        token = _current_turn.set(turn)
+        try:
+            yield turn
+        except Exception as e:
+            turn.record("error", message=str(e))
+            raise
+        finally:
+            _current_turn.reset(token)
+            line = json.dumps(turn.to_dict(), default=str)
+            with self.lock:
+                with open(self.path, 'a') as f:
+                    f.write(line + '\n')
+
+
+def record(event_type: str, **fields):
+    """Add an event to the chat turn being traced in this context, if any"""
+    turn = _current_turn.get()
+    if turn is not None:
+        turn.record(event_type, **fields)
+
+
+trace_recorder = TraceRecorder()
+
+
+_profile_lock = threading.Lock()
+
+
+@contextmanager
+def profile(name: str):
+    """Profile the block with PROFILE_REQUESTS and write the report to PROFILE_DIR"""
+    # Only one profiler can be active per process
+    if not _profile_lock.acquire(blocking=False):
+        print(f"Skipping profile of {name}: another request is being profiled")
+        yield
+        return
+
+    try:
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        report_name = f"{time.strftime('%Y%m%d-%H%M%S')}-{name.strip('/').replace('/', '_') or 'root'}"
+
+        if PROFILE_REQUESTS == 'pyinstrument':
+            from pyinstrument import Profiler
+
+            profiler = Profiler(async_mode='enabled')
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                report_path = PROFILE_DIR / f"{report_name}.html"
+                report_path.write_text(profiler.output_html())
+        else:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                report_path = PROFILE_DIR / f"{report_name}.prof"
+                profiler.dump_stats(report_path)
+
+        print(f"Profile written to {report_path}")
+    finally:
+        _profile_lock.release()
+
+
+class ReplayChatSession:
+    """Stands in for a Gemini ChatSession, answering with recorded responses"""
+
+    def __init__(self, responses: Iterator[Dict[str, Any]], speed: float):
+        self.responses = responses
+        self.speed = speed
+        self.history = []
+
+    def send_message(self, content):
+        event = next(self.responses, None)
+        if event is None:
+            raise Exception("Trace has no more recorded model responses for this turn")
+
+        time.sleep(event.get("duration", 0) * self.speed)
+
+        # Text parts must not have a function_call attribute, see chat()
+        parts = []
+        for part in event["parts"]:
+            if "function_call" in part:
+                parts.append(SimpleNamespace(function_call=SimpleNamespace(**part["function_call"])))
+            else:
+                parts.append(SimpleNamespace(text=part.get("text", "")))
+        return SimpleNamespace(parts=parts)
+
+
+class ReplayModel:
+
+    def __init__(self, speed: float):
+        self.speed = speed
+        self.responses: Iterator[Dict[str, Any]] = iter([])
+
+    def start_chat(self, history=None):
+        return ReplayChatSession(self.responses, self.speed)
+
+
+class ReplayGmailClient:
+    """Stands in for GmailClient, answering tool calls with recorded results"""
+
+    def __init__(self, speed: float):
+        self.speed = speed
+        self.tool_calls: Iterator[Dict[str, Any]] = iter([])
+
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
+        event = next(self.tool_calls, None)
+        if event is None:
+            raise Exception(f"Trace has no more recorded tool calls (got {tool_name})")
+        if event["name"] != tool_name:
+            print(f"  Replay diverged: recorded {event['name']}, got {tool_name}")
+
+        await asyncio.sleep(event.get("duration", 0) * self.speed)
+
+        if "error" in event:
+            raise Exception(event["error"])
+        return event["result"]
+
+
+async def replay(path: str, speed: float = 1.0):
+    """Re-run every turn of a trace file against stubbed backends"""
+    import llm_client as llm_module
+    from tracing import trace_recorder
+    from state import MemoryStateBackend
+
+    # Don't append the replayed turns to the trace being replayed
+    trace_recorder.path = None
+
+    llm_module._load_genai()
+    client = llm_module.llm_client
+    if client is None:
+        raise SystemExit("LLM client is not configured (GEMINI_API_KEY is needed to construct it)")
+
+    model = ReplayModel(speed)
+    tools = ReplayGmailClient(speed)
+    client.model = model
+    client.gmail_client = tools
+
+    with open(path) as f:
+        turns = [json.loads(line) for line in f if line.strip()]
+
+    # Replayed chat sessions must not reach the real (possibly shared) state backend
+    state_backend = llm_module.state_backend
+    llm_module.state_backend = MemoryStateBackend()
+    try:
+        for i, turn in enumerate(turns, 1):
+            events = turn["events"]
+            model.responses = iter([event for event in events if event["type"] == "model_response"])
+            tools.tool_calls = iter([event for event in events if event["type"] == "tool_call"])
+            recorded = next((event["text"] for event in events if event["type"] == "response"), None)
+
+            started = time.monotonic()
+            response = await client.chat(turn["message"], session_id=f"replay-{i}")
+            elapsed = time.monotonic() - started
+
+            status = "same response" if response == recorded else "DIFFERENT response"
+            print(f"Turn {i}: recorded {turn['duration']:.3f}s, replayed {elapsed:.3f}s, {status}")
+    finally:
+        llm_module.state_backend = state_backend
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay recorded chat traces")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    replay_parser = subparsers.add_parser("replay", help="Re-run a trace against stubbed backends")
+    replay_parser.add_argument("path", help="Trace file written with CHAT_TRACE_PATH")
+    replay_parser.add_argument("--speed", type=float, default=1.0,
+                               help="Multiplier for recorded latencies (0 to skip waiting)")
+    args = parser.parse_args(argv)
+
+    if args.command == "replay":
+        asyncio.run(replay(args.path, args.speed))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,7 @@ import { useEffect, useState } from 'react';
 import { ApiService } from '@/services/api';
 import type { FullEmail } from '@/types';
 import { Button } from '@/components/ui/button';
-import { Loader2, Mail, ArrowLeft } from 'lucide-react';
+import { Loader2, Mail, ArrowLeft, Paperclip } from 'lucide-react';
 import { ScrollArea } from '@/components/ui/scroll-area';
 
 interface EmailViewProps {
@@ -110,6 +110,30 @@ export function EmailView({ emailId, onBack }: EmailViewProps) {
                 <pre className="whitespace-pre-wrap font-sans text-gray-800">
                     {email.body}
                 </pre>
+                {email.body_truncated && email.body_handle && (
+                    <a
+                    href={ApiService.emailBodyUrl(email.body_handle)}
+                    target="_blank"
+                    rel="noreferrer"
+                    className="text-sm text-blue-600 hover:underline"
+                    >
+                    Message truncated, view the full message ({Math.ceil((email.body_size ?? 0) / 1024)} KB)
+                    </a>
+                )}
+                {email.attachments && email.attachments.length > 0 && (
+                    <div className="mt-6 space-y-2 not-prose">
+                    {email.attachments.map((attachment) => (
+                        <a
+                        key={attachment.attachment_id}
+                        href={ApiService.attachmentUrl(email.id, attachment)}
+                        className="flex items-center text-sm text-blue-600 hover:underline"
+                        >
+                        <Paperclip className="w-4 h-4 mr-2" />
+                        {attachment.filename} ({Math.ceil(attachment.size / 1024)} KB)
+                        </a>
+                    ))}
+                    </div>
+                )}
                 </div>
             </ScrollArea>
         </div>
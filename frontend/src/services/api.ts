@@ -1,8 +1,29 @@
-import type { ApiResponse, EmailListData, FullEmail, AuthStatus } from '@/types';
+import type { ApiResponse, EmailListData, EmailListDelta, EmailAttachment, FullEmail, AuthStatus } from '@/types';
 
 const API_BASE = 'http://localhost:8080/api';
 const AUTH_BASE = 'http://localhost:8080/auth';
 
+// Last email list per (maxResults, query) with its ETag, so refreshes only
+// transfer what changed since then
+const emailListCache = new Map<string, { etag: string; data: EmailListData }>();
+
+function applyEmailListDelta(list: EmailListData, delta: EmailListDelta, maxResults: number): EmailListData {
+    const labels = new Map(delta.changed.map((change): [string, string[]] => [change.id, change.labels]));
+
+    const kept = list.messages.map(email => {
+        const changed = labels.get(email.id);
+        return changed ? { ...email, labels: changed } : email;
+    });
+    const keptIds = new Set(kept.map(email => email.id));
+    const added = delta.added.filter(email => !keptIds.has(email.id));
+
+    // Emails restored from trash can be older than the listed ones
+    const messages = [...added, ...kept]
+        .sort((a, b) => (b.timestamp ?? 0) - (a.timestamp ?? 0))
+        .slice(0, maxResults);
+    return { count: messages.length, messages, sync_token: delta.sync_token, full: true };
+}
+
 export class ApiService {
   
     static async checkAuthStatus(): Promise<AuthStatus> {
@@ -30,6 +51,7 @@ export class ApiService {
     }
 
     static async logout(): Promise<{ success: boolean; message: string }> {
+        emailListCache.clear();
         try {
             const response = await fetch(`${API_BASE}/auth/logout`, {
                 method: 'POST',
@@ -51,10 +73,14 @@ export class ApiService {
         query: string = ''
     ): Promise<ApiResponse<EmailListData>> {
         try {
+        const cacheKey = `${maxResults}:${query}`;
+        const cached = emailListCache.get(cacheKey);
+
         const response = await fetch(`${API_BASE}/emails/list`, {
             method: 'POST',
             headers: { 
-            'Content-Type': 'application/json' 
+            'Content-Type': 'application/json',
+            ...(cached ? { 'If-None-Match': cached.etag } : {})
             },
             body: JSON.stringify({ 
             max_results: maxResults, 
@@ -62,18 +88,36 @@ export class ApiService {
             })
         });
 
+        // Nothing changed since the cached list
+        if (response.status === 304 && cached) {
+            return { status: 200, message: 'Emails unchanged', data: cached.data };
+        }
+
         if (!response.ok) {
             throw new Error(`HTTP ${response.status}: ${response.statusText}`);
         }
 
-        const data = await response.json();
+        let data = await response.json();
         
         // If the response is a string (from MCP), parse it
         if (typeof data === 'string') {
-            return JSON.parse(data);
+            data = JSON.parse(data);
+        }
+
+        if (data.status !== 200 || !data.data) {
+            return data;
+        }
+
+        const list: EmailListData = data.data.full === false && cached
+            ? applyEmailListDelta(cached.data, data.data, maxResults)
+            : data.data;
+
+        const etag = response.headers.get('ETag');
+        if (etag) {
+            emailListCache.set(cacheKey, { etag, data: list });
         }
         
-        return data;
+        return { ...data, data: list };
         } catch (error) {
         console.error('List emails failed:', error);
         throw error;
@@ -110,6 +154,18 @@ export class ApiService {
         }
     }
 
+    static emailBodyUrl(handle: string): string {
+        return `${API_BASE}/emails/blobs/${handle}`;
+    }
+
+    static attachmentUrl(emailId: string, attachment: EmailAttachment): string {
+        const params = new URLSearchParams({
+            filename: attachment.filename,
+            mime_type: attachment.mime_type
+        });
+        return `${API_BASE}/emails/${emailId}/attachments/${encodeURIComponent(attachment.attachment_id)}?${params}`;
+    }
+
     static async sendEmail(
         to: string,
         subject: string,
@@ -3,11 +3,24 @@ export interface Email {
   from: string;
   subject: string;
   date: string;
+  labels?: string[];
+  timestamp?: number;
+}
+
+export interface EmailAttachment {
+  attachment_id: string;
+  filename: string;
+  mime_type: string;
+  size: number;
 }
 
 export interface FullEmail extends Email {
   body: string;
   to?: string;
+  body_truncated?: boolean;
+  body_handle?: string | null;
+  body_size?: number;
+  attachments?: EmailAttachment[];
 }
 
 export interface ApiResponse<T = any> {
@@ -19,6 +32,20 @@ export interface ApiResponse<T = any> {
 export interface EmailListData {
   count: number;
   messages: Email[];
+  sync_token?: string;
+  full?: boolean;
+}
+
+export interface EmailListDelta {
+  sync_token: string;
+  full: false;
+  added: Email[];
+  changed: EmailLabelChange[];
+}
+
+export interface EmailLabelChange {
+  id: string;
+  labels: string[];
 }
 
 export interface AuthStatus {